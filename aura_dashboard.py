@@ -1,16 +1,45 @@
+import logging
 import os
+import tempfile
+import time
 import psycopg2
 import pandas as pd
 from dotenv import load_dotenv
 import streamlit as st
-from datetime import datetime as dt
+from datetime import datetime as dt, timedelta
+from functools import partial
 import plotly.graph_objects as go
 import plotly.express as px
 from io import BytesIO
+from contextlib import contextmanager
+from connection_pool import ConnectionPool
+from query_executor import run_queries_concurrently
+from single_flight import SingleFlight
+from result_store import create_result_store, result_key
+from olap_cube import HourlyCube
+from incremental_cache import ScanCache
+from columnar_fetch import FetchProgress, fetch_columnar, stream_query
+from frame_schema import compact_frame, concat_compact
+from session_store import SessionFrameStore
+from exporters import EXPORT_FORMATS, build_export, content_hash
+from export_jobs import CANCELLED, DONE, FAILED, ExportJobRunner
+from synthetic_data import DEFAULT_SOURCES, synthetic_dashboard_frames
+from local_backend import local_database
+from query_telemetry import EXPLAIN, MISS, SCAN_CACHE, QueryTelemetry, query_label
+import query_preflight
+from query_preflight import ScanCostGuard, explain_queries
+import rollup
+import render_profiler
+from metrics import DashboardMetrics
+from render_profiler import profiled
 
 # Load environment variables
 load_dotenv()
 
+# Copy-on-write: selections and column assignments share data with the session's frames
+# until something is modified, so the render path needs no defensive copies
+pd.set_option('mode.copy_on_write', True)
+
 # Set page configuration
 st.set_page_config(
     page_title="Aura Dashboard",
@@ -36,8 +65,69 @@ BRANDS = [
 
 FEATURES = ['oobe', 'silent', 'gotw', 'publisher promotion', 'reef', 'reengagement promotion', 'recurring OOBE']
 
+# Query mode: 'single_scan' reads apps.supply_aura_rtm once and derives every view locally,
+# 'multi' runs the four per-view queries concurrently
+QUERY_MODE = os.getenv('AURA_QUERY_MODE', 'single_scan')
+
+# Shared on-disk result cache for several dashboard processes on one host:
+# 'arrow' (memory-mapped Arrow files), 'sqlite', or empty to disable
+RESULT_STORE_BACKEND = os.getenv('AURA_RESULT_STORE', '')
+TODAY_RESULT_TTL = 60  # seconds; today's rows keep arriving
+DATA_TTL = 300  # seconds get_data keeps a load
+
+# Stream results through a named server-side cursor in fixed-size chunks (bounded memory)
+STREAMING_FETCH = os.getenv('AURA_STREAMING_FETCH', '').lower() in ('1', 'true', 'yes')
+FETCH_CHUNK_ROWS = int(os.getenv('AURA_FETCH_CHUNK_ROWS', 10000))
+
+# Database backend: 'redshift', or 'duckdb' for a local stand-in loaded with synthetic data
+DB_BACKEND = os.getenv('AURA_DB_BACKEND', 'redshift')
+
+# Query telemetry: rotating JSONL log ('' disables it) and the optional sidebar Performance panel
+TELEMETRY_LOG = os.getenv('AURA_TELEMETRY_LOG', os.path.join(tempfile.gettempdir(), 'aura_telemetry', 'queries.jsonl'))
+PERFORMANCE_PANEL = os.getenv('AURA_PERFORMANCE_PANEL', '').lower() in ('1', 'true', 'yes')
+
+# Hourly rollup (rollup.py): dashboard loads read it instead of the fact table when it covers
+# their window and was refreshed within the max lag; expensive loads are routed to it by the preflight
+USE_ROLLUP = os.getenv('AURA_USE_ROLLUP', '').lower() in ('1', 'true', 'yes')
+ROLLUP_TABLE = os.getenv('AURA_ROLLUP_TABLE', rollup.DEFAULT_TABLE)
+ROLLUP_MAX_LAG_MINUTES = int(os.getenv('AURA_ROLLUP_MAX_LAG_MINUTES', 15))
+
+# EXPLAIN preflight of loads that have to query: 'warn' or 'confirm' above the limits below,
+# anything else is off (Redshift plan cost units and estimated rows scanned; 0 disables a limit)
+PREFLIGHT_MODE = query_preflight.parse_mode(os.getenv('AURA_PREFLIGHT'))
+if PREFLIGHT_MODE is None and os.getenv('AURA_PREFLIGHT', '').strip().lower() not in ('', 'off'):
+    logging.getLogger(__name__).warning("AURA_PREFLIGHT=%r is not 'warn' or 'confirm'; the preflight is off", os.getenv('AURA_PREFLIGHT'))
+PREFLIGHT_MAX_COST = float(os.getenv('AURA_PREFLIGHT_MAX_COST', 0)) or None
+PREFLIGHT_MAX_ROWS = int(os.getenv('AURA_PREFLIGHT_MAX_ROWS', 50000000)) or None
+
+# Prometheus-style /metrics endpoint of this process (empty port disables it)
+METRICS_PORT = os.getenv('AURA_METRICS_PORT', '')
+METRICS_HOST = os.getenv('AURA_METRICS_HOST', '127.0.0.1')
+
+# Seed of the synthetic data shown when the database is unreachable
+SAMPLE_SEED = int(os.getenv('AURA_SAMPLE_SEED', 0))
+
+# Background raw extracts: output directory, concurrent jobs, per-extract statement timeout and
+# the largest file offered as a browser download (bigger ones are picked up from EXPORT_DIR)
+EXPORT_DIR = os.getenv('AURA_EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'aura_exports'))
+EXPORT_WORKERS = int(os.getenv('AURA_EXPORT_WORKERS', 1))
+EXPORT_TIMEOUT_MS = int(os.getenv('AURA_EXPORT_TIMEOUT_MS', 1800000))
+EXPORT_DOWNLOAD_MAX_MB = int(os.getenv('AURA_EXPORT_DOWNLOAD_MAX_MB', 200))
+
+# Loaded data each session keeps between reruns; least recently used loads are evicted beyond this
+SESSION_MEMORY_MB = int(os.getenv('AURA_SESSION_MEMORY_MB', 256))
+
+# Render profiling of every rerun: 'stages' (stage timings) or 'cprofile' (also a cProfile dump);
+# a ?profile=stages|cprofile|off query parameter overrides it for one browser tab
+PROFILE_MODE = os.getenv('AURA_PROFILE', '')
+PROFILE_DIR = os.getenv('AURA_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'aura_profiles'))
+
+render_profiler.start(render_profiler.parse_mode(
+    st.experimental_get_query_params().get('profile', [PROFILE_MODE])[0]
+))
+
 # Custom CSS for dark theme with readable text
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     /* Main app background with gradient */
     .stApp {
@@ -230,10 +320,27 @@ st.markdown("""
         overflow: hidden;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
-def get_connection():
-    """Establish connection to Redshift database"""
+with render_profiler.stage('custom_css'):
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+QUERY_TIMEOUT_MS = 120000  # 120 seconds (2 minutes)
+
+def create_connection():
+    """Open a new connection to Redshift (used by the connection pool)
+    
+    With AURA_DB_BACKEND=duckdb, connects to the local DuckDB stand-in instead.
+    """
+    if DB_BACKEND == 'duckdb':
+        return local_database(
+            BRANDS, FEATURES,
+            days=int(os.getenv('AURA_LOCAL_DAYS', 8)),
+            rows_per_hour=int(os.getenv('AURA_LOCAL_ROWS_PER_HOUR', 1)),
+            seed=int(os.getenv('AURA_LOCAL_SEED', 0)),
+            path=os.getenv('AURA_LOCAL_DB_PATH'),
+        ).connect()
+    
     try:
         # Get credentials from environment variables
         conn_params = {
@@ -247,12 +354,125 @@ def get_connection():
         # Attempt to establish connection
         conn = psycopg2.connect(**conn_params)
         conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"SET statement_timeout = {QUERY_TIMEOUT_MS}")
         return conn
         
     except (psycopg2.OperationalError, Exception):
         return None
 
-def build_sql_query(selected_source=None, selected_brands=None, selected_features=None):
+@st.cache_resource
+def get_connection_pool():
+    """Process-wide Redshift connection pool shared by all sessions and reruns"""
+    pool = ConnectionPool(
+        create_connection,
+        minconn=int(os.getenv('REDSHIFT_POOL_MIN', 1)),
+        maxconn=int(os.getenv('REDSHIFT_POOL_MAX', 10)),
+        max_idle_seconds=int(os.getenv('REDSHIFT_POOL_IDLE_TIMEOUT', 300)),
+        checkout_timeout=int(os.getenv('REDSHIFT_POOL_CHECKOUT_TIMEOUT', 30)),
+    )
+    pool.warm()
+    get_metrics().watch_pool(pool)
+    return pool
+
+@st.cache_resource
+def get_single_flight():
+    """Process-wide group that coalesces identical in-flight queries across sessions"""
+    return SingleFlight()
+
+@st.cache_resource
+def get_result_store():
+    """Process-wide handle on the shared result store (None when disabled)"""
+    store = create_result_store(
+        RESULT_STORE_BACKEND,
+        path=os.getenv('AURA_RESULT_STORE_PATH'),
+        max_bytes=int(os.getenv('AURA_RESULT_STORE_MAX_MB', 512)) * 1024 ** 2,
+    )
+    if store is not None:
+        get_metrics().watch_cache('result_store', store.stats)
+    return store
+
+@st.cache_resource
+def get_export_runner():
+    """Process-wide background runner for raw extracts (jobs outlive reruns and sessions)"""
+    return ExportJobRunner(
+        get_connection_pool(), EXPORT_DIR, workers=EXPORT_WORKERS,
+        statement_timeout_ms=EXPORT_TIMEOUT_MS, default_timeout_ms=QUERY_TIMEOUT_MS,
+        telemetry=get_query_telemetry(),
+    )
+
+@st.cache_resource
+def get_query_telemetry():
+    """Process-wide query telemetry recorder (records from every session)"""
+    return QueryTelemetry(
+        TELEMETRY_LOG or None,
+        max_bytes=int(os.getenv('AURA_TELEMETRY_LOG_MB', 10)) * 1024 ** 2,
+        backups=int(os.getenv('AURA_TELEMETRY_LOG_BACKUPS', 5)),
+        on_record=get_metrics().observe_query,
+    )
+
+@st.cache_resource
+def get_metrics():
+    """Process-wide metrics, served at /metrics on AURA_METRICS_PORT when set"""
+    metrics = DashboardMetrics()
+    if METRICS_PORT:
+        try:
+            metrics.serve(int(METRICS_PORT), METRICS_HOST)
+        except OSError as e:
+            # e.g. another dashboard process on this host already serves the port
+            logging.getLogger(__name__).warning("Metrics endpoint not started on %s:%s: %s", METRICS_HOST, METRICS_PORT, e)
+    return metrics
+
+@contextmanager
+def get_connection():
+    """Borrow a pooled Redshift connection; yields None if the database is unreachable"""
+    pool = get_connection_pool()
+    try:
+        conn = pool.getconn()
+    except Exception:
+        conn = None
+    
+    try:
+        yield conn
+    finally:
+        if conn is not None:
+            pool.putconn(conn)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_rollup_state():
+    """State of the hourly rollup (re-read every minute), or None if it has not been created
+    
+    Raises when the database cannot be reached, so a failure is not cached.
+    """
+    with get_connection() as conn:
+        if conn is None:
+            raise ConnectionError("Could not connect to the database")
+        return rollup.read_state(conn, ROLLUP_TABLE)
+
+def rollup_covers(start, end=None):
+    """Whether the hourly rollup can answer queries over [start, end] (UTC; end defaults to now)
+    
+    False when its state cannot be read.
+    """
+    try:
+        state = get_rollup_state()
+    except Exception:
+        return False
+    return rollup.covers(state, start, end, max_lag=timedelta(minutes=ROLLUP_MAX_LAG_MINUTES))
+
+def load_table():
+    """Table a load's queries read, resolved once per load and passed to the query builders:
+    the hourly rollup when AURA_USE_ROLLUP is on and it covers the dashboard window,
+    otherwise the raw fact table"""
+    if USE_ROLLUP and rollup_covers(dashboard_window_start()):
+        return ROLLUP_TABLE
+    return rollup.FACT_TABLE
+
+def dashboard_window_start():
+    """First hour any dashboard view reads: midnight (UTC) of the day one week ago"""
+    return dt.combine(dt.utcnow().date() - timedelta(days=7), dt.min.time())
+
+def build_sql_query(selected_source=None, selected_brands=None, selected_features=None, table=rollup.FACT_TABLE):
     """Build SQL query dynamically with selected brands and features"""
     brands_to_use = selected_brands if selected_brands else BRANDS
     brands_str = "', '".join(brands_to_use)
@@ -272,7 +492,7 @@ today_metrics AS (
         COALESCE(SUM(notification_shown), 0) AS notif_today,
         COALESCE(SUM(experience_shown), 0) AS exp_today,
         COALESCE(SUM(install_success), 0) AS install_today
-    FROM apps.supply_aura_rtm
+    FROM {table}
     WHERE brand IN ('{brands_str}')
       AND feature IN ('{features_str}')
       {source_filter}
@@ -288,7 +508,7 @@ last_week_metrics AS (
         COALESCE(SUM(notification_shown), 0) AS notif_last_week,
         COALESCE(SUM(experience_shown), 0) AS exp_last_week,
         COALESCE(SUM(install_success), 0) AS install_last_week
-    FROM apps.supply_aura_rtm
+    FROM {table}
     WHERE brand IN ('{brands_str}')
       AND feature IN ('{features_str}')
       {source_filter}
@@ -338,7 +558,7 @@ FULL OUTER JOIN last_week_metrics l
 ORDER BY brand, feature
 """
 
-def build_new_devices_query(selected_brands=None, selected_source=None, selected_features=None):
+def build_new_devices_query(selected_brands=None, selected_source=None, selected_features=None, table=rollup.FACT_TABLE):
     """Build simple query for new_devices"""
     brands_to_use = selected_brands if selected_brands else BRANDS
     brands_str = "', '".join(brands_to_use)
@@ -350,13 +570,13 @@ def build_new_devices_query(selected_brands=None, selected_source=None, selected
 SELECT 
     COALESCE(SUM(CASE WHEN date_hour >= TRUNC(GETDATE()) AND date_hour <= GETDATE() THEN new_devices ELSE 0 END), 0) AS new_devices_today,
     COALESCE(SUM(CASE WHEN date_hour >= DATEADD(day, -7, TRUNC(GETDATE())) AND date_hour <= DATEADD(hour, -2, DATEADD(day, -7, GETDATE())) THEN new_devices ELSE 0 END), 0) AS new_devices_last_week
-FROM apps.supply_aura_rtm
+FROM {table}
 WHERE brand IN ('{brands_str}')
   AND feature IN ('{features_str}')
   {source_filter}
 """
 
-def build_new_devices_hourly_query(selected_source=None, selected_brands=None, selected_features=None):
+def build_new_devices_hourly_query(selected_source=None, selected_brands=None, selected_features=None, table=rollup.FACT_TABLE):
     """Build hourly query for new_devices only"""
     brands_to_use = selected_brands if selected_brands else BRANDS
     brands_str = "', '".join(brands_to_use)
@@ -369,7 +589,7 @@ SELECT
     EXTRACT(HOUR FROM date_hour) AS hour_of_day,
     SUM(CASE WHEN date_hour >= TRUNC(GETDATE()) AND date_hour <= GETDATE() THEN new_devices ELSE 0 END) AS new_devices_today,
     SUM(CASE WHEN date_hour >= DATEADD(day, -7, TRUNC(GETDATE())) AND date_hour <= DATEADD(hour, -2, DATEADD(day, -7, GETDATE())) THEN new_devices ELSE 0 END) AS new_devices_last_week
-FROM apps.supply_aura_rtm
+FROM {table}
 WHERE brand IN ('{brands_str}')
   AND feature IN ('{features_str}')
   {source_filter}
@@ -382,7 +602,7 @@ GROUP BY EXTRACT(HOUR FROM date_hour)
 ORDER BY hour_of_day
 """
 
-def build_hourly_query(selected_source=None, selected_brands=None, selected_features=None):
+def build_hourly_query(selected_source=None, selected_brands=None, selected_features=None, table=rollup.FACT_TABLE):
     """Build hourly SQL query dynamically with selected brands and features"""
     brands_to_use = selected_brands if selected_brands else BRANDS
     brands_str = "', '".join(brands_to_use)
@@ -402,7 +622,7 @@ todays_hourly AS (
         COALESCE(SUM(experience_shown), 0) AS experiences,
         COALESCE(SUM(install_success), 0) AS installs,
         COALESCE(SUM(new_devices), 0) AS new_devices
-    FROM apps.supply_aura_rtm
+    FROM {table}
     WHERE brand IN ('{brands_str}')
       AND feature IN ('{features_str}')
       {source_filter}
@@ -420,7 +640,7 @@ last_week_hourly AS (
         COALESCE(SUM(experience_shown), 0) AS experiences,
         COALESCE(SUM(install_success), 0) AS installs,
         COALESCE(SUM(new_devices), 0) AS new_devices
-    FROM apps.supply_aura_rtm
+    FROM {table}
     WHERE brand IN ('{brands_str}')
       AND feature IN ('{features_str}')
       {source_filter}
@@ -450,121 +670,483 @@ FULL OUTER JOIN last_week_hourly l
 ORDER BY hour_of_day
 """
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_sample_data():
-    """Generate sample data for demonstration purposes"""
-    import random
-    from datetime import datetime, timedelta
-    
-    # Generate sample data for the last 7 days
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=7)
-    
-    # Configuration constants
-    CUSTOMERS = [
-        "ntt_docomo", "softbank", "htc", "motorola_eu", "samsung_om", "lenovo_sea", 
-        "at-t", "kddisamsung", "com.aura.oobe.vodafone", "wiko", "newsroom", "asus", 
-        "motorola_apac", "samsung_na", "samsung_sea", "t-mobile", "vodafone", "lenovo", 
-        "samsung", "vodafoneSamsung", "lenovo_latam", "softbanksamsung", "sprint", "tinno", 
-        "hutchison", "lenovo_na", "samsung_itd", "samsung_cis", "rakuten", "lenovo_eu", 
-        "motorola", "sliide", "oppo_latam", "honor", "dish", "oppo_cis", "samsung_eu", 
-        "Bouygues", "solutions", "lenovo_apac", "motorola_latam", "deutschetelekomsamsung", 
-        "samsung_gl", "samsung_mea", "oppo_sea", "clearly_google_play", "dish-sdk", 
-        "motorola_north_america", "sony", "cricket", "deutschetelekom", "oppo_eu", 
-        "samsungsfr", "huawei", "ntt_docomo_samsung", "orange", "rakutensamsung", "kddi", 
-        "lenovo_mea", "oppo", "lenovo_cis", "bouygues-primary", "oppo_mea"
-    ]
-    FEATURES = ['oobe', 'silent', 'gotw', 'publisher promotion', 'reef', 'reengagement promotion', 'recurring OOBE']
-    
-    data = []
-    for brand in BRANDS:
-        for feature in FEATURES:
-            base_value = random.randint(100, 1000)
-            data.append({
-                'brand': brand,
-                'feature': feature,
-                'revenue_today': base_value * random.uniform(0.8, 1.2),
-                'revenue_last_week': base_value,
-                'notif_today': base_value * random.randint(80, 120) // 100,
-                'notif_last_week': base_value,
-                'exp_today': base_value * random.randint(80, 120) // 100,
-                'exp_last_week': base_value,
-                'install_today': base_value * random.randint(80, 120) // 100,
-                'install_last_week': base_value,
-                'new_devices_today': base_value * random.randint(70, 130) // 100,
-                'new_devices_last_week': base_value,
-            })
-    
-    df = pd.DataFrame(data)
-    
-    # Calculate differences and percentages
-    for metric in ['revenue', 'notif', 'exp', 'install', 'new_devices']:
-        df[f'{metric}_diff'] = df[f'{metric}_today'] - df[f'{metric}_last_week']
-        df[f'{metric}_pct_diff'] = (df[f'{metric}_today'] / df[f'{metric}_last_week'] - 1) * 100
-    
-    return df
+def build_single_scan_query(selected_source=None, selected_brands=None, selected_features=None, since_hours=None, period=None, table=rollup.FACT_TABLE):
+    """Build one query that scans both periods at source × brand × feature × hour × period granularity
+    
+    The summary, new_devices totals and hourly frames are all derived from this result
+    locally (see dashboard_frames), so the fact table is read once per load.
+    since_hours ({'today': h, 'last_week': h}) limits each period to rows from hour h onward
+    for incremental refreshes. period='today' scans only today; period='last_week' scans the
+    whole day one week ago (it is immutable, so it can be cached until midnight and cut to
+    the comparison window locally). `table` is the fact table or the hourly rollup (see
+    load_table), which have the same columns.
+    """
+    brands_to_use = selected_brands if selected_brands else BRANDS
+    brands_str = "', '".join(brands_to_use)
+    features_to_use = selected_features if selected_features else FEATURES
+    features_str = "', '".join(features_to_use)
+    source_filter = f"AND source = '{selected_source}'" if selected_source else ""
+    
+    # High-water marks for incremental refresh
+    since_hours = since_hours or {}
+    today_since = f"AND date_hour >= DATEADD(hour, {int(since_hours['today'])}, TRUNC(GETDATE()))" if 'today' in since_hours else ""
+    last_week_since = f"AND date_hour >= DATEADD(hour, {int(since_hours['last_week'])}, DATEADD(day, -7, TRUNC(GETDATE())))" if 'last_week' in since_hours else ""
+    
+    today_window = f"(date_hour >= TRUNC(GETDATE()) AND date_hour <= GETDATE() {today_since})"
+    if period == 'last_week':
+        last_week_window = f"(date_hour >= DATEADD(day, -7, TRUNC(GETDATE())) AND date_hour < DATEADD(day, -6, TRUNC(GETDATE())) {last_week_since})"
+    else:
+        last_week_window = f"(date_hour >= DATEADD(day, -7, TRUNC(GETDATE())) AND date_hour <= DATEADD(hour, -2, DATEADD(day, -7, GETDATE())) {last_week_since})"
+    
+    if period == 'today':
+        date_filter = today_window
+    elif period == 'last_week':
+        date_filter = last_week_window
+    else:
+        date_filter = f"""(
+    {today_window}
+    OR
+    {last_week_window}
+  )"""
+    
+    return f"""
+SELECT 
+    source,
+    brand,
+    feature,
+    EXTRACT(HOUR FROM date_hour) AS hour_of_day,
+    CASE WHEN date_hour >= TRUNC(GETDATE()) THEN 'today' ELSE 'last_week' END AS period,
+    COALESCE(SUM(revenue), 0) AS revenue,
+    COALESCE(SUM(notification_shown), 0) AS notif,
+    COALESCE(SUM(experience_shown), 0) AS exp,
+    COALESCE(SUM(install_success), 0) AS install,
+    COALESCE(SUM(new_devices), 0) AS new_devices
+FROM {table}
+WHERE brand IN ('{brands_str}')
+  AND feature IN ('{features_str}')
+  {source_filter}
+  AND {date_filter}
+GROUP BY 1, 2, 3, 4, 5
+"""
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_data(selected_source=None, selected_brands=None, selected_features=None):
-    """Fetch data from Redshift with selected filters"""
-    conn = get_connection()
+def build_raw_extract_query(selected_source=None, selected_brands=None, selected_features=None, start_date=None, end_date=None, count_only=False):
+    """Build a query for raw hour-level rows between start_date and end_date (inclusive, UTC days)
     
-    if conn is None:
-        st.error("❌ Could not connect to database. Please check your credentials.")
-        return pd.DataFrame(), False
+    Always reads the fact table itself (never the hourly rollup), so the rows are raw.
+    count_only=True returns the row count of the same extract (used for progress reporting).
+    """
+    brands_to_use = selected_brands if selected_brands else BRANDS
+    brands_str = "', '".join(brands_to_use)
+    features_to_use = selected_features if selected_features else FEATURES
+    features_str = "', '".join(features_to_use)
+    source_filter = f"AND source = '{selected_source}'" if selected_source else ""
+    end_exclusive = end_date + timedelta(days=1)
+    
+    if count_only:
+        columns = "COUNT(*) AS row_count"
+        order_by = ""
+    else:
+        columns = """date_hour,
+    source,
+    brand,
+    feature,
+    revenue,
+    notification_shown,
+    experience_shown,
+    install_success,
+    new_devices"""
+        order_by = "ORDER BY date_hour, brand, feature"
     
+    return f"""
+SELECT 
+    {columns}
+FROM {rollup.FACT_TABLE}
+WHERE brand IN ('{brands_str}')
+  AND feature IN ('{features_str}')
+  {source_filter}
+  AND date_hour >= '{start_date:%Y-%m-%d}'
+  AND date_hour < '{end_exclusive:%Y-%m-%d}'
+{order_by}
+"""
+
+@st.cache_data(ttl=300)  # Cache for 5 minutes
+def get_sample_data(selected_source=None, selected_brands=None, selected_features=None):
+    """Generate sample data for demonstration purposes
+    
+    Same frames as a live load (summary, hourly, new_devices hourly) for the selection,
+    through the current UTC hour. Returns (df, hourly_df, new_devices_hourly).
+    """
+    df, hourly_df, (new_devices_today, new_devices_last_week), new_devices_hourly = synthetic_dashboard_frames(
+        selected_brands if selected_brands else BRANDS,
+        selected_features if selected_features else FEATURES,
+        [selected_source] if selected_source else DEFAULT_SOURCES,
+        through_hour=dt.utcnow().hour,
+        seed=SAMPLE_SEED,
+    )
+    set_new_devices_attrs(df, new_devices_today, new_devices_last_week)
+    return df, hourly_df, new_devices_hourly
+
+def run_query(sql, conn, progress=None, timings=None):
+    """Execute a query on a borrowed connection and return the result as a DataFrame
+    
+    With AURA_STREAMING_FETCH the rows are streamed in FETCH_CHUNK_ROWS chunks (each cast
+    to the compact schema as it arrives) and counted in `progress`. The result is cast to
+    the compact schema (frame_schema). Execute/fetch seconds are added to `timings`.
+    """
+    if STREAMING_FETCH:
+        df = stream_query(sql, conn, FETCH_CHUNK_ROWS, transform=compact_frame, progress=progress, timings=timings)
+    else:
+        df = fetch_columnar(sql, conn, timings=timings)
+    # Every cached copy (result store, scan cache, session) uses the compact schema
+    return compact_frame(df)
+
+def set_new_devices_attrs(df, today_val, last_week_val):
+    """Store new_devices totals as metadata in df.attrs (not as columns!)"""
+    df.attrs['new_devices_today'] = today_val
+    df.attrs['new_devices_last_week'] = last_week_val
+    df.attrs['new_devices_diff'] = today_val - last_week_val
+    df.attrs['new_devices_pct_diff'] = ((today_val - last_week_val) / last_week_val * 100) if last_week_val > 0 else 0
+
+@st.cache_resource
+def get_scan_cache():
+    """Process-wide "today" scan slices, refreshed incrementally and shared across filter sets"""
+    cache = ScanCache(incremental=True)
+    get_metrics().watch_cache('scan_today', cache.stats, hits=('full_hits', 'partial_hits'))
+    return cache
+
+@st.cache_resource
+def get_last_week_cache():
+    """Process-wide last-week scan slices, valid until the UTC day rolls over"""
+    cache = ScanCache(incremental=False)
+    get_metrics().watch_cache('scan_last_week', cache.stats, hits=('full_hits', 'partial_hits'))
+    return cache
+
+def last_week_cutoff_hour(now):
+    """Latest last-week hour inside the comparison window, or None before 02:00
+    
+    date_hour is hour-aligned, so date_hour <= GETDATE() - 7 days - 2 hours keeps exactly
+    the hours up to the hour of (now - 2h) on the same day.
+    """
+    cutoff = now - timedelta(hours=2)
+    return cutoff.hour if cutoff.date() == now.date() else None
+
+def scan_queries(jobs, period, table=rollup.FACT_TABLE):
+    """({i: sql}, {i: telemetry label}) of (source, brands, features, since_hours) scans of one period"""
+    queries = {
+        i: build_single_scan_query(source, brands, features, since_hours, period=period, table=table)
+        for i, (source, brands, features, since_hours) in enumerate(jobs)
+    }
+    labels = {
+        i: query_label('build_single_scan_query', source, brands, features, period=period, incremental=since_hours is not None)
+        for i, (source, brands, features, since_hours) in enumerate(jobs)
+    }
+    return queries, labels
+
+def run_scans(jobs, period, table=rollup.FACT_TABLE, progress=None, on_wait=None):
+    """Run (source, brands, features, since_hours) scans of one period of `table` concurrently"""
+    queries, labels = scan_queries(jobs, period, table)
+    if period == 'last_week':
+        # Last week's day is immutable until the UTC day rolls over
+        now = dt.utcnow()
+        ttl = (dt.combine(now.date() + timedelta(days=1), dt.min.time()) - now).total_seconds()
+    else:
+        ttl = TODAY_RESULT_TTL
+    bundle = run_queries_concurrently(
+        queries, get_connection_pool(),
+        fetch=partial(run_query, progress=progress),
+        single_flight=get_single_flight(), result_store=get_result_store(), ttl=ttl, on_wait=on_wait,
+        telemetry=get_query_telemetry(), labels=labels,
+    )
+    if bundle.errors:
+        raise next(iter(bundle.errors.values()))
+    return [bundle[i] for i in range(len(jobs))]
+
+def load_scan_period(scan_cache, period, selected_source, brands, features, day, table=rollup.FACT_TABLE, progress=None, on_wait=None):
+    """One period's scan rows from its cache tier; loads needing no query are recorded as scan-cache hits"""
+    started = time.perf_counter()
+    queried = []
+    
+    def fetch(jobs):
+        queried.append(len(jobs))
+        return run_scans(jobs, period=period, table=table, progress=progress, on_wait=on_wait)
+    
+    raw = scan_cache.load(selected_source, brands, features, fetch, day=day)
+    if not queried:
+        get_query_telemetry().record(
+            query_label('build_single_scan_query', selected_source, brands, features, period=period),
+            SCAN_CACHE, {}, time.perf_counter() - started, raw,
+        )
+    return raw
+
+def fetch_single_scan(selected_source=None, selected_brands=None, selected_features=None, progress=None, on_wait=None, table=rollup.FACT_TABLE):
+    """Single-scan rows for the filters, split into two coverage-aware cache tiers
+    
+    Today's slice is re-queried incrementally from its high-water mark; last week's full
+    day is queried once per day and cut to the sliding comparison window locally. Any
+    source/brand/feature subset of already cached data is served by filtering locally, and
+    only missing brand × feature pairs are queried (from `table`).
+    """
+    # GETDATE() on Redshift is UTC, so cache days and cutoffs follow UTC as well
+    now = dt.utcnow()
+    brands = selected_brands if selected_brands else BRANDS
+    features = selected_features if selected_features else FEATURES
+    
+    today_raw = load_scan_period(get_scan_cache(), 'today', selected_source, brands, features, now.date(), table, progress, on_wait)
+    
+    cutoff_hour = last_week_cutoff_hour(now)
+    if cutoff_hour is None:
+        # Before 02:00 the comparison window is empty: don't scan (and cache) last week's day yet
+        return today_raw
+    last_week_raw = load_scan_period(get_last_week_cache(), 'last_week', selected_source, brands, features, now.date(), table, progress, on_wait)
+    if not last_week_raw.empty:
+        last_week_raw = last_week_raw[last_week_raw['hour_of_day'] <= cutoff_hour]
+    return concat_compact([today_raw, last_week_raw])
+
+def fetch_progress_indicator():
+    """(progress, on_wait) pair showing rows fetched so far while queries stream, else (None, None)"""
+    if not STREAMING_FETCH:
+        return None, None
+    progress = FetchProgress()
+    status = st.empty()
+    return progress, lambda: status.caption(f"📥 {progress.rows:,} rows fetched...")
+
+def get_session_frames():
+    """This session's loaded data, bounded by SESSION_MEMORY_MB (created on first use)"""
+    if 'session_frames' not in st.session_state:
+        metrics = get_metrics()
+        st.session_state['session_frames'] = SessionFrameStore(SESSION_MEMORY_MB * 1024 ** 2, on_evict=metrics.session_evicted)
+        metrics.track_session(st.session_state['session_frames'])
+    return st.session_state['session_frames']
+
+def selection_key(selected_source, selected_brands, selected_features):
+    """Session store key of a source/brands/features selection"""
+    return (selected_source, tuple(sorted(selected_brands or [])), tuple(sorted(selected_features or [])))
+
+def find_covering_cube(selected_source, selected_brands, selected_features):
+    """Most recently used load in this session whose cube can answer the selection, or None"""
+    return get_session_frames().find(
+        lambda data: data.get('cube') is not None and data['cube'].covers(selected_source, selected_brands, selected_features)
+    )
+
+@profiled
+def cube_frames(cube, selected_source=None, selected_brands=None, selected_features=None):
+    """Slice the dashboard frames for a selection out of an in-memory cube"""
+    df, hourly_df, (new_devices_today, new_devices_last_week), new_devices_hourly = cube.frames(
+        selected_source, selected_brands, selected_features
+    )
+    df = compact_frame(df)
+    set_new_devices_attrs(df, new_devices_today, new_devices_last_week)
+    return df, compact_frame(hourly_df), compact_frame(new_devices_hourly)
+
+def load_queries(selected_source=None, selected_brands=None, selected_features=None, table=rollup.FACT_TABLE):
+    """({name: sql}, {name: telemetry label}) of the four per-view queries of a 'multi' mode load of `table`"""
+    brands = selected_brands if selected_brands else BRANDS
+    features = selected_features if selected_features else FEATURES
+    queries = {
+        'summary': build_sql_query(selected_source, selected_brands, selected_features, table),
+        'new_devices': build_new_devices_query(selected_brands, selected_source, selected_features, table),
+        'hourly': build_hourly_query(selected_source, selected_brands, selected_features, table),
+        'new_devices_hourly': build_new_devices_hourly_query(selected_source, selected_brands, selected_features, table),
+    }
+    labels = {
+        'summary': query_label('build_sql_query', selected_source, brands, features),
+        'new_devices': query_label('build_new_devices_query', selected_source, brands, features),
+        'hourly': query_label('build_hourly_query', selected_source, brands, features),
+        'new_devices_hourly': query_label('build_new_devices_hourly_query', selected_source, brands, features),
+    }
+    return queries, labels
+
+def pending_load_queries(selected_source=None, selected_brands=None, selected_features=None, table=rollup.FACT_TABLE):
+    """({name: sql}, {name: telemetry label}) of the queries a load of `table` would actually send now
+    
+    In 'single_scan' mode these are the scans the two cache tiers are missing (plus due
+    incremental refreshes); in 'multi' mode the four queries. Queries the shared result
+    store already holds are left out. Empty when the caches answer the whole load.
+    """
+    if QUERY_MODE == 'single_scan':
+        now = dt.utcnow()
+        brands = selected_brands if selected_brands else BRANDS
+        features = selected_features if selected_features else FEATURES
+        tiers = [('today', get_scan_cache())]
+        if last_week_cutoff_hour(now) is not None:
+            tiers.append(('last_week', get_last_week_cache()))
+        queries, labels = {}, {}
+        for period, scan_cache in tiers:
+            jobs = scan_cache.pending_jobs(selected_source, brands, features, now.date())
+            period_queries, period_labels = scan_queries(jobs, period, table)
+            queries.update({(period, i): sql for i, sql in period_queries.items()})
+            labels.update({(period, i): label for i, label in period_labels.items()})
+    else:
+        queries, labels = load_queries(selected_source, selected_brands, selected_features, table)
+    
+    store = get_result_store()
+    if store is not None:
+        queries = {name: sql for name, sql in queries.items() if not store.contains(result_key(sql))}
+    return queries, {name: labels[name] for name in queries}
+
+@st.cache_data(ttl=300, show_spinner=False)
+def explain_load(queries, labels):
+    """{name: PlanEstimate} of a load's queries, cached by their SQL (plans are recorded in the telemetry)
+    
+    Errors (e.g. the database is unreachable) are raised, so they are not cached.
+    """
+    return explain_queries(get_connection_pool(), queries, telemetry=get_query_telemetry(), labels=labels)
+
+def route_to_rollup(verdict, selection):
+    """Preflight route: an expensive load of the fact table reads the hourly rollup instead if it covers the window"""
+    if load_table() == ROLLUP_TABLE or not rollup_covers(dashboard_window_start()):
+        return None
+    return ROLLUP_TABLE
+
+def get_scan_cost_guard():
+    """Preflight limits; an over-limit load is offered to the guard's route hook first"""
+    return ScanCostGuard(max_cost=PREFLIGHT_MAX_COST, max_rows=PREFLIGHT_MAX_ROWS, route=route_to_rollup)
+
+@profiled
+def preflight_load(selected_source, selected_brands, selected_features):
+    """EXPLAIN the queries a load has to send first; route, warn about or ask to confirm a
+    load estimated over the limits
+    
+    Loads the caches answer are not estimated. Returns (allowed, table): allowed is False
+    while a 'confirm' mode load waits for the user to confirm it; table is where the load
+    was routed (None: where it would go anyway).
+    """
+    if get_data_cached(selected_source, selected_brands, selected_features):
+        return True, None
+    queries, labels = pending_load_queries(selected_source, selected_brands, selected_features, load_table())
+    if not queries:
+        return True, None
     try:
-        # Build and execute main query
-        query = build_sql_query(selected_source, selected_brands, selected_features)
-        with conn.cursor() as cur:
-            cur.execute("SET statement_timeout = 120000")  # 120 seconds (2 minutes)
-        
+        with st.spinner("🧮 Estimating query cost..."):
+            estimates = explain_load(queries, labels)
+    except Exception:
+        # The load itself reports an unreachable database
+        return True, None
+    
+    verdict = get_scan_cost_guard().check(estimates, (selected_source, selected_brands, selected_features))
+    if not verdict.over_limit:
+        return True, None
+    if verdict.route:
+        st.info(f"🔀 Expensive load ({verdict.summary()}) routed to {verdict.route}")
+        return True, verdict.route
+    
+    st.warning(f"⚠️ This load is estimated to be expensive: {'; '.join(verdict.reasons)}. It may run up to the {QUERY_TIMEOUT_MS // 1000} s timeout.")
+    if PREFLIGHT_MODE != query_preflight.CONFIRM:
+        return True, None
+    
+    key = selection_key(selected_source, selected_brands, selected_features)
+    if st.session_state.get('preflight_confirmed') == key:
+        return True, None
+    if st.button("⚠️ Run Anyway", key="preflight_confirm"):
+        st.session_state['preflight_confirmed'] = key
+        return True, None
+    st.info("👆 Narrow the brand/feature selection, or confirm to run the load as it is")
+    return False, None
+
+def sample_fallback(selected_source, selected_brands, selected_features, reason):
+    """get_data's result when live data is unavailable: the sample frames (counted in the metrics)"""
+    get_metrics().sample_fallback(reason)
+    return (*get_sample_data(selected_source, selected_brands, selected_features), False, None)
+
+@st.cache_resource
+def get_cached_loads():
+    """Process-wide {get_data arguments: monotonic time computed}, mirroring get_data's cache"""
+    return {}
+
+def cached_load_key(selected_source, selected_brands, selected_features, table=None):
+    """get_cached_loads key of get_data's arguments (in their order, like get_data's cache)"""
+    return (selected_source, tuple(selected_brands or ()), tuple(selected_features or ()), table)
+
+def get_data_cached(selected_source=None, selected_brands=None, selected_features=None, table=None):
+    """Whether get_data would answer these arguments from its cache (no query)"""
+    computed_at = get_cached_loads().get(cached_load_key(selected_source, selected_brands, selected_features, table))
+    return computed_at is not None and time.monotonic() - computed_at < DATA_TTL
+
+def clear_data_cache():
+    """Drop get_data's cached loads"""
+    get_data.clear()
+    get_cached_loads().clear()
+
+@st.cache_data(ttl=DATA_TTL)
+def get_data(selected_source=None, selected_brands=None, selected_features=None, table=None):
+    """Fetch summary and hourly data from Redshift with selected filters
+    
+    In 'single_scan' mode one query feeds an in-memory cube that every view is sliced
+    from; in 'multi' mode the four independent queries run concurrently on separate
+    pooled connections (and no cube is built). Every query reads `table`, resolved once
+    for the load when None (see load_table).
+    Returns (df, hourly_df, new_devices_hourly, is_real_data, cube).
+    """
+    get_metrics().computed()
+    get_cached_loads()[cached_load_key(selected_source, selected_brands, selected_features, table)] = time.monotonic()
+    table = table or load_table()
+    if QUERY_MODE == 'single_scan':
         with st.sidebar:
             with st.spinner("🔍 Executing query... This may take up to 2 minutes."):
-                df = pd.read_sql(query, conn)
-                
-                # Get new_devices separately (faster query)
+                progress, on_wait = fetch_progress_indicator()
                 try:
-                    new_devices_df = pd.read_sql(build_new_devices_query(selected_brands, selected_source, selected_features), conn)
-                    
-                    if not new_devices_df.empty:
-                        # Store new_devices separately (not per row!)
-                        today_val = new_devices_df['new_devices_today'].iloc[0]
-                        last_week_val = new_devices_df['new_devices_last_week'].iloc[0]
-                        
-                        # Store as metadata in df.attrs (not as columns!)
-                        df.attrs['new_devices_today'] = today_val
-                        df.attrs['new_devices_last_week'] = last_week_val
-                        df.attrs['new_devices_diff'] = today_val - last_week_val
-                        df.attrs['new_devices_pct_diff'] = ((today_val - last_week_val) / last_week_val * 100) if last_week_val > 0 else 0
-                    else:
-                        st.warning("⚠️ New devices query returned empty DataFrame")
-                        df.attrs['new_devices_today'] = 0
-                        df.attrs['new_devices_last_week'] = 0
-                        df.attrs['new_devices_diff'] = 0
-                        df.attrs['new_devices_pct_diff'] = 0
-                except Exception as e:
-                    # If new_devices query fails, add zeros
-                    st.error(f"❌ New devices query failed: {str(e)}")
-                    df.attrs['new_devices_today'] = 0
-                    df.attrs['new_devices_last_week'] = 0
-                    df.attrs['new_devices_diff'] = 0
-                    df.attrs['new_devices_pct_diff'] = 0
+                    raw = fetch_single_scan(selected_source, selected_brands, selected_features, progress, on_wait, table)
+                except ConnectionError:
+                    st.error("❌ Could not connect to database. Please check your credentials.")
+                    return pd.DataFrame(), pd.DataFrame(), None, False, None
+                except (psycopg2.OperationalError, Exception):
+                    return sample_fallback(selected_source, selected_brands, selected_features, 'query_error')
         
+        cube = HourlyCube.from_raw(
+            raw,
+            selected_brands if selected_brands else BRANDS,
+            selected_features if selected_features else FEATURES,
+            selected_source,
+        )
+        df, hourly_df, new_devices_hourly = cube_frames(cube, selected_source, selected_brands, selected_features)
         if df.empty:
-            return get_sample_data(), False
-            
-        return df, True
-        
-    except (psycopg2.OperationalError, Exception):
-        return get_sample_data(), False
-    finally:
-        if conn is not None:
-            try:
-                conn.close()
-            except Exception:
-                pass
+            return sample_fallback(selected_source, selected_brands, selected_features, 'empty_result')
+        return df, hourly_df, new_devices_hourly, True, cube
+    
+    queries, labels = load_queries(selected_source, selected_brands, selected_features, table)
+    
+    with st.sidebar:
+        with st.spinner("🔍 Executing queries... This may take up to 2 minutes."):
+            progress, on_wait = fetch_progress_indicator()
+            bundle = run_queries_concurrently(
+                queries, get_connection_pool(), fetch=partial(run_query, progress=progress),
+                single_flight=get_single_flight(), result_store=get_result_store(), ttl=300, on_wait=on_wait,
+                telemetry=get_query_telemetry(), labels=labels,
+            )
+    
+    if not bundle.ok('summary'):
+        if isinstance(bundle.errors.get('summary'), ConnectionError):
+            st.error("❌ Could not connect to database. Please check your credentials.")
+            return pd.DataFrame(), pd.DataFrame(), None, False, None
+        return sample_fallback(selected_source, selected_brands, selected_features, 'query_error')
+    
+    df = bundle['summary']
+    if df.empty:
+        return sample_fallback(selected_source, selected_brands, selected_features, 'empty_result')
+    
+    # Get new_devices separately (not per row!)
+    if bundle.ok('new_devices') and not bundle['new_devices'].empty:
+        new_devices_df = bundle['new_devices']
+        set_new_devices_attrs(df, new_devices_df['new_devices_today'].iloc[0], new_devices_df['new_devices_last_week'].iloc[0])
+    else:
+        if 'new_devices' in bundle.errors:
+            # If new_devices query fails, add zeros
+            st.error(f"❌ New devices query failed: {str(bundle.errors['new_devices'])}")
+        else:
+            st.warning("⚠️ New devices query returned empty DataFrame")
+        set_new_devices_attrs(df, 0, 0)
+    
+    # Hourly data for charts
+    hourly_df = bundle['hourly'] if bundle.ok('hourly') else pd.DataFrame()
+    if 'hourly' in bundle.errors:
+        st.sidebar.warning(f"⚠️ Could not load hourly data: {str(bundle.errors['hourly'])}")
+    
+    # new_devices hourly is not grouped by feature
+    new_devices_hourly = bundle['new_devices_hourly'] if bundle.ok('new_devices_hourly') else None
+    
+    return df, hourly_df, new_devices_hourly, True, None
 
+@profiled
 def export_to_excel(df, filename="aura_data.xlsx"):
     """Export DataFrame to Excel file"""
     output = BytesIO()
@@ -573,6 +1155,160 @@ def export_to_excel(df, filename="aura_data.xlsx"):
     output.seek(0)
     return output
 
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_export_file(content_key, export_format, _frames):
+    """Export bytes for frames whose content hash is `content_key` (frames are not re-hashed)"""
+    return build_export(_frames, export_format)
+
+@profiled
+def render_export_controls(filtered_df, filtered_hourly_df=None, new_devices_hourly=None):
+    """Format/sheet pickers and a download button whose file is only built on request"""
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        formats_by_label = {label: fmt for fmt, (label, _, _) in EXPORT_FORMATS.items()}
+        export_format = formats_by_label[st.selectbox("Export format", list(formats_by_label), key="export_format")]
+    with col2:
+        extra_sheets = st.multiselect(
+            "Also include",
+            ['Hourly', 'New Devices Hourly'],
+            default=[],
+            key="export_extra_sheets"
+        )
+    
+    frames = {'Aura Data': filtered_df}
+    if 'Hourly' in extra_sheets and filtered_hourly_df is not None and not filtered_hourly_df.empty:
+        frames['Hourly'] = filtered_hourly_df
+    if 'New Devices Hourly' in extra_sheets and new_devices_hourly is not None and not new_devices_hourly.empty:
+        frames['New Devices Hourly'] = new_devices_hourly
+    
+    with col3:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("📦 Prepare Export", use_container_width=True):
+            st.session_state['export_request'] = (export_format, tuple(frames))
+    
+    # Only hash and build once an export was asked for with these options
+    if st.session_state.get('export_request') != (export_format, tuple(frames)):
+        return
+    with st.spinner("📦 Building export..."):
+        data, extension, mime = build_export_file(content_hash(frames), export_format, frames)
+    st.download_button(
+        label=f"📥 Download {EXPORT_FORMATS[export_format][0]}",
+        data=data,
+        file_name=f"aura_data_{dt.now().strftime('%Y%m%d_%H%M')}.{extension}",
+        mime=mime,
+        use_container_width=False
+    )
+
+def render_extract_download(job):
+    """A finished extract's file; it is only read into memory (up to EXPORT_DOWNLOAD_MAX_MB)
+    once the user asks for a browser download, and only for one job per session at a time"""
+    if not os.path.exists(job.path):
+        st.caption(f"⚠️ {job.rows:,} rows · the file is no longer at {job.path}")
+        return
+    size = os.path.getsize(job.path)
+    st.caption(f"✅ {job.rows:,} rows · {size / 1024 ** 2:,.1f} MB · {job.path}")
+    if size > EXPORT_DOWNLOAD_MAX_MB * 1024 ** 2:
+        st.caption(f"📁 Over {EXPORT_DOWNLOAD_MAX_MB} MB: copy the file from the server instead of downloading it here")
+        return
+    if st.session_state.get('extract_download') != job.id:
+        if not st.button("📦 Prepare Download", key=f"extract_prepare_{job.id}", use_container_width=True):
+            return
+        st.session_state['extract_download'] = job.id
+    with open(job.path, 'rb') as f:
+        data = f.read()
+    st.download_button("📥 Download", data=data, file_name=os.path.basename(job.path), key=f"extract_download_{job.id}", use_container_width=True)
+
+@profiled
+def render_extract_panel(selected_source, selected_brands, selected_features):
+    """Sidebar panel to submit raw hour-level extracts and follow the session's jobs"""
+    runner = get_export_runner()
+    job_ids = st.session_state.setdefault('extract_jobs', [])
+    
+    with st.sidebar.expander("📤 Raw Extract"):
+        st.caption("Hour-level rows for the current source/brand/feature selection, written to a file in the background")
+        today = dt.utcnow().date()
+        date_range = st.date_input("Date range (UTC)", value=(today - timedelta(days=7), today), key="extract_dates")
+        formats_by_label = {label: fmt for fmt, (label, _, _) in EXPORT_FORMATS.items()}
+        extract_format = formats_by_label[st.selectbox("File format", list(formats_by_label), index=1, key="extract_format")]
+        
+        if st.button("📤 Start Extract", use_container_width=True):
+            if isinstance(date_range, (tuple, list)) and len(date_range) == 2:
+                start_date, end_date = date_range
+                job = runner.submit(
+                    f"{start_date:%Y-%m-%d} → {end_date:%Y-%m-%d}",
+                    build_raw_extract_query(selected_source, selected_brands, selected_features, start_date, end_date),
+                    extract_format,
+                    count_sql=build_raw_extract_query(selected_source, selected_brands, selected_features, start_date, end_date, count_only=True),
+                    label=query_label(
+                        'build_raw_extract_query', selected_source,
+                        selected_brands if selected_brands else BRANDS,
+                        selected_features if selected_features else FEATURES,
+                    ),
+                )
+                job_ids.append(job.id)
+            else:
+                st.warning("⚠️ Pick both a start and an end date")
+        
+        jobs = [job for job in (runner.get(job_id) for job_id in reversed(job_ids)) if job is not None]
+        for job in jobs:
+            st.markdown(f"**{job.title}** · {EXPORT_FORMATS[job.fmt][0]}")
+            if job.status == DONE:
+                render_extract_download(job)
+            elif job.status == FAILED:
+                st.error(f"❌ Extract failed: {job.error}")
+            elif job.status == CANCELLED:
+                st.caption(f"🚫 Cancelled after {job.rows:,} rows")
+            else:
+                total = f" / {job.total_rows:,}" if job.total_rows is not None else ""
+                st.progress(job.progress or 0.0, text=f"⏳ {job.status.capitalize()}: {job.rows:,}{total} rows")
+                if st.button("🛑 Cancel", key=f"extract_cancel_{job.id}", use_container_width=True):
+                    runner.cancel(job.id)
+                    st.rerun()
+        
+        if any(not job.finished for job in jobs):
+            if st.button("🔄 Refresh Status", key="extract_refresh", use_container_width=True):
+                st.rerun()
+
+@profiled
+def render_performance_panel():
+    """Sidebar panel with recent query telemetry and the slowest filter combinations"""
+    telemetry = get_query_telemetry()
+    records = telemetry.frame()
+    
+    with st.expander("⏱️ Performance"):
+        if records.empty:
+            st.caption("No queries recorded yet")
+            return
+        
+        queries = records[records['cache'] != EXPLAIN]
+        executed = queries[queries['cache'] == MISS]
+        cached_share = 1 - len(executed) / len(queries) if len(queries) else 0
+        median_ms = executed['total_ms'].median() if not executed.empty else 0
+        st.caption(f"{len(queries):,} recent queries · {cached_share:.0%} served from cache · median {median_ms:,.0f} ms when executed")
+        
+        columns = ['builder', 'period', 'fingerprint', 'cache', 'connect_ms', 'execute_ms', 'fetch_ms', 'total_ms', 'rows', 'bytes', 'plan_cost', 'plan_rows', 'error']
+        recent = records.iloc[::-1].head(20)
+        st.dataframe(
+            recent[[c for c in columns if c in recent.columns]],
+            hide_index=True,
+            use_container_width=True,
+            column_config={'bytes': st.column_config.NumberColumn("bytes", step=1)},
+        )
+        
+        slowest = telemetry.slowest()
+        if not slowest.empty:
+            st.markdown("**Slowest filter combinations**")
+            st.dataframe(slowest, hide_index=True, use_container_width=True)
+        
+        plans = records[records['cache'] == EXPLAIN]
+        if not plans.empty:
+            latest = plans.iloc[-1]
+            st.markdown(f"**Latest preflight plan** · {latest['builder']}")
+            st.code(latest['plan'], language=None)
+        
+        if telemetry.log_path:
+            st.caption(f"Log: {telemetry.log_path}")
+
 def format_metric(value, is_currency=False):
     """Format metric value with appropriate formatting"""
     if pd.isna(value):
@@ -581,6 +1317,20 @@ def format_metric(value, is_currency=False):
         return f"${value:,.2f}"
     return f"{value:,.0f}"
 
+def detailed_data_column_config(df):
+    """NumberColumn formats for the Detailed Data table: % changes, $ revenue and integer counts"""
+    column_config = {}
+    for col in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        if 'pct_diff' in col:
+            column_config[col] = st.column_config.NumberColumn(format="%+.1f%%")
+        elif 'revenue' in col:
+            column_config[col] = st.column_config.NumberColumn(format="$%.2f")
+        else:
+            column_config[col] = st.column_config.NumberColumn(format="%d")
+    return column_config
+
 def render_metric_box(title, value, prev_value, is_currency=False):
     """Render a simple metric box"""
     delta = None
@@ -595,30 +1345,160 @@ def render_metric_box(title, value, prev_value, is_currency=False):
     </div>
     """, unsafe_allow_html=True)
 
-def plot_hourly_comparison(df, metric, title, y_axis_label, israel_time=True, chart_key=None, new_devices_hourly=None):
+HOURLY_CHART_COLUMNS = [
+    f'{metric}_{period}'
+    for metric in ('revenue', 'notif', 'exp', 'install')
+    for period in ('today', 'last_week')
+]
+
+@profiled
+def prepare_hourly_charts(filtered_hourly_df, new_devices_hourly=None):
+    """Sum every hourly metric by hour in one pass, keyed by content for the chart cache
+    
+    Computed once per rerun and shared by the Overview and Hourly Trends tabs.
+    """
+    if filtered_hourly_df is not None and not filtered_hourly_df.empty:
+        columns = [c for c in HOURLY_CHART_COLUMNS if c in filtered_hourly_df.columns]
+        by_hour = filtered_hourly_df.groupby('hour_of_day')[columns].sum().reset_index()
+    else:
+        by_hour = pd.DataFrame()
+    frames = {'by_hour': by_hour}
+    if new_devices_hourly is not None and not new_devices_hourly.empty:
+        frames['new_devices'] = new_devices_hourly
+    return {'frames': frames, 'key': content_hash(frames)}
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def hourly_figure_spec(content_key, metric, title, y_axis_label, israel_time, current_hour, _hourly_agg):
+    """Plotly figure spec (dict) of one hourly chart, or None when there is nothing to plot
+    
+    Cached by the content hash of the hourly totals, so identical charts are built once.
+    """
+    hourly_agg = _hourly_agg
+    if hourly_agg.empty or f'{metric}_today' not in hourly_agg.columns:
+        return None
+    
+    # The data is already in Israel time from the DB
+    # No conversion needed
+    hour_column = 'hour_of_day'
+    if israel_time:
+        x_axis_title = 'Hour of Day (Israel Time)'
+    else:
+        x_axis_title = 'Hour of Day (UTC)'
+    
+    # Filter out hours with no data FIRST
+    hourly_agg_filtered = hourly_agg[
+        (hourly_agg[f'{metric}_today'] > 0) | 
+        (hourly_agg[f'{metric}_last_week'] > 0)
+    ]
+    
+    # Then filter by current hour for today's data
+    today_data = hourly_agg_filtered[
+        (hourly_agg_filtered['hour_of_day'] <= current_hour) &
+        (hourly_agg_filtered[f'{metric}_today'] > 0)
+    ]
+    last_week_data = hourly_agg_filtered[
+        hourly_agg_filtered[f'{metric}_last_week'] > 0
+    ]
+    
+    # Sort by the display hour column
+    today_data = today_data.sort_values(hour_column)
+    last_week_data = last_week_data.sort_values(hour_column)
+    
+    if today_data.empty and last_week_data.empty:
+        return None
+    
+    # Create the plot with go.Figure for better control
+    fig = go.Figure()
+    
+    # Add today's line (only up to current hour)
+    if not today_data.empty:
+        fig.add_trace(go.Scatter(
+            x=today_data['hour_of_day'],
+            y=today_data[f'{metric}_today'],
+            name='Today',
+            mode='lines+markers',
+            line=dict(color='#0066CC', width=4),
+            marker=dict(size=10, symbol='circle', line=dict(width=2, color='white')),
+            hovertemplate='<b>Today</b><br>Hour: %{x}:00<br>Value: %{y:,.0f}<extra></extra>'
+        ))
+    
+    # Add last week's line
+    if not last_week_data.empty:
+        fig.add_trace(go.Scatter(
+            x=last_week_data['hour_of_day'],
+            y=last_week_data[f'{metric}_last_week'],
+            name='Last Week',
+            mode='lines+markers',
+            line=dict(color='#FF8C00', width=4, dash='dash'),
+            marker=dict(size=10, symbol='diamond', line=dict(width=2, color='white')),
+            hovertemplate='<b>Last Week</b><br>Hour: %{x}:00<br>Value: %{y:,.0f}<extra></extra>'
+        ))
+    
+    # Update layout with better visibility
+    fig.update_layout(
+        title=dict(
+            text=title, 
+            font=dict(size=18, color='#1f1f1f', family='Arial Black'),
+            x=0.5,
+            xanchor='center'
+        ),
+        xaxis_title=dict(text=x_axis_title, font=dict(size=14, color='#1f1f1f')),
+        yaxis_title=dict(text=y_axis_label, font=dict(size=14, color='#1f1f1f')),
+        plot_bgcolor='#f8f9fa',
+        paper_bgcolor='white',
+        hovermode='x unified',
+        height=450,
+        xaxis=dict(
+            tickmode='linear',
+            tick0=0,
+            dtick=1,
+            showgrid=True,
+            gridcolor='#e0e0e0',
+            gridwidth=1,
+            linecolor='#333',
+            linewidth=2,
+            mirror=True,
+            tickfont=dict(size=12, color='#1f1f1f')
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='#e0e0e0',
+            gridwidth=1,
+            linecolor='#333',
+            linewidth=2,
+            mirror=True,
+            rangemode='tozero',
+            tickfont=dict(size=12, color='#1f1f1f')
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            bgcolor='rgba(255,255,255,0.9)',
+            bordercolor='#333',
+            borderwidth=1,
+            font=dict(size=12, color='#1f1f1f')
+        ),
+        margin=dict(l=60, r=40, t=80, b=60)
+    )
+    
+    return fig.to_dict()
+
+def plot_hourly_comparison(hourly_charts, metric, title, y_axis_label, israel_time=True, chart_key=None):
     """Helper function to plot hourly comparison charts with improved interactivity"""
+    with render_profiler.stage(f"plot_hourly_comparison[{chart_key or metric}]"):
+        _plot_hourly_comparison(hourly_charts, metric, title, y_axis_label, israel_time, chart_key)
+
+def _plot_hourly_comparison(hourly_charts, metric, title, y_axis_label, israel_time, chart_key):
     try:
-        # Special handling for new_devices (passed separately)
-        if metric == 'new_devices':
-            if new_devices_hourly is not None and not new_devices_hourly.empty:
-                hourly_agg = new_devices_hourly.copy()
-            else:
-                st.info(f"No data available for {title}")
-                return
-        else:
-            # Aggregate data by hour
-            hourly_agg = df.groupby('hour_of_day').agg({
-                f'{metric}_today': 'sum',
-                f'{metric}_last_week': 'sum'
-            }).reset_index()
-        
-        # The data is already in Israel time from the DB
-        # No conversion needed
-        hour_column = 'hour_of_day'
-        if israel_time:
-            x_axis_title = 'Hour of Day (Israel Time)'
-        else:
-            x_axis_title = 'Hour of Day (UTC)'
+        # new_devices comes from its own hourly query; everything else from the shared totals
+        frame_name = 'new_devices' if metric == 'new_devices' else 'by_hour'
+        hourly_agg = hourly_charts['frames'].get(frame_name)
+        if hourly_agg is None or hourly_agg.empty:
+            st.info(f"No data available for {title}")
+            return
         
         # Get the current hour to limit today's data
         from datetime import datetime
@@ -631,106 +1511,11 @@ def plot_hourly_comparison(df, metric, title, y_axis_label, israel_time=True, ch
         else:
             current_hour = datetime.utcnow().hour
         
-        # Filter out hours with no data FIRST
-        hourly_agg_filtered = hourly_agg[
-            (hourly_agg[f'{metric}_today'] > 0) | 
-            (hourly_agg[f'{metric}_last_week'] > 0)
-        ].copy()
-        
-        # Then filter by current hour for today's data
-        today_data = hourly_agg_filtered[
-            (hourly_agg_filtered['hour_of_day'] <= current_hour) &
-            (hourly_agg_filtered[f'{metric}_today'] > 0)
-        ].copy()
-        last_week_data = hourly_agg_filtered[
-            hourly_agg_filtered[f'{metric}_last_week'] > 0
-        ].copy()
-        
-        # Sort by the display hour column
-        today_data = today_data.sort_values(hour_column)
-        last_week_data = last_week_data.sort_values(hour_column)
-        
-        if today_data.empty and last_week_data.empty:
+        fig = hourly_figure_spec(hourly_charts['key'], metric, title, y_axis_label, israel_time, current_hour, hourly_agg)
+        if fig is None:
             st.info(f"No data available for {title}")
             return
         
-        # Create the plot with go.Figure for better control
-        fig = go.Figure()
-        
-        # Add today's line (only up to current hour)
-        if not today_data.empty:
-            fig.add_trace(go.Scatter(
-                x=today_data['hour_of_day'],
-                y=today_data[f'{metric}_today'],
-                name='Today',
-                mode='lines+markers',
-                line=dict(color='#0066CC', width=4),
-                marker=dict(size=10, symbol='circle', line=dict(width=2, color='white')),
-                hovertemplate='<b>Today</b><br>Hour: %{x}:00<br>Value: %{y:,.0f}<extra></extra>'
-            ))
-        
-        # Add last week's line
-        if not last_week_data.empty:
-            fig.add_trace(go.Scatter(
-                x=last_week_data['hour_of_day'],
-                y=last_week_data[f'{metric}_last_week'],
-                name='Last Week',
-                mode='lines+markers',
-                line=dict(color='#FF8C00', width=4, dash='dash'),
-                marker=dict(size=10, symbol='diamond', line=dict(width=2, color='white')),
-                hovertemplate='<b>Last Week</b><br>Hour: %{x}:00<br>Value: %{y:,.0f}<extra></extra>'
-            ))
-        
-        # Update layout with better visibility
-        fig.update_layout(
-            title=dict(
-                text=title, 
-                font=dict(size=18, color='#1f1f1f', family='Arial Black'),
-                x=0.5,
-                xanchor='center'
-            ),
-            xaxis_title=dict(text=x_axis_title, font=dict(size=14, color='#1f1f1f')),
-            yaxis_title=dict(text=y_axis_label, font=dict(size=14, color='#1f1f1f')),
-            plot_bgcolor='#f8f9fa',
-            paper_bgcolor='white',
-            hovermode='x unified',
-            height=450,
-            xaxis=dict(
-                tickmode='linear',
-                tick0=0,
-                dtick=1,
-                showgrid=True,
-                gridcolor='#e0e0e0',
-                gridwidth=1,
-                linecolor='#333',
-                linewidth=2,
-                mirror=True,
-                tickfont=dict(size=12, color='#1f1f1f')
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='#e0e0e0',
-                gridwidth=1,
-                linecolor='#333',
-                linewidth=2,
-                mirror=True,
-                rangemode='tozero',
-                tickfont=dict(size=12, color='#1f1f1f')
-            ),
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1,
-                bgcolor='rgba(255,255,255,0.9)',
-                bordercolor='#333',
-                borderwidth=1,
-                font=dict(size=12, color='#1f1f1f')
-            ),
-            margin=dict(l=60, r=40, t=80, b=60)
-        )
-        
         # Use unique key if provided, otherwise generate from metric and title
         unique_key = chart_key if chart_key else f"chart_{metric}_{title.replace(' ', '_')}"
         st.plotly_chart(fig, use_container_width=True, key=unique_key)
@@ -738,13 +1523,13 @@ def plot_hourly_comparison(df, metric, title, y_axis_label, israel_time=True, ch
     except Exception as e:
         st.error(f"Error generating {title} chart: {str(e)}")
 
+@profiled
 def aggregate_brands_data(df, selected_brands):
     """Aggregate data from multiple brands into a single combined view"""
     if df.empty:
         return df
     
-    # Create a copy and add a combined brand name
-    aggregated_df = df.copy()
+    # Add a combined brand name
     combined_brand_name = f"Combined ({len(selected_brands)} brands)"
     
     # Group by feature and aggregate all metrics
@@ -759,7 +1544,7 @@ def aggregate_brands_data(df, selected_brands):
         'install_last_week': 'sum'
     }
     
-    aggregated = aggregated_df.groupby('feature').agg(agg_dict).reset_index()
+    aggregated = df.groupby('feature', observed=True).agg(agg_dict).reset_index()
     aggregated['brand'] = combined_brand_name
     
     # Preserve new_devices from attrs if exists
@@ -777,6 +1562,7 @@ def aggregate_brands_data(df, selected_brands):
     
     return aggregated
 
+@profiled
 def aggregate_hourly_data(df, selected_brands):
     """Aggregate hourly data from multiple brands"""
     if df.empty:
@@ -796,11 +1582,12 @@ def aggregate_hourly_data(df, selected_brands):
         'install_last_week': 'sum'
     }
     
-    aggregated = df.groupby(['feature', 'hour_of_day']).agg(agg_dict).reset_index()
+    aggregated = df.groupby(['feature', 'hour_of_day'], observed=True).agg(agg_dict).reset_index()
     aggregated['brand'] = combined_brand_name
     
     return aggregated
 
+@profiled
 def generate_insights(filtered_df, filtered_hourly_df, new_devices_today, new_devices_last_week):
     """Generate smart insights from the data"""
     insights = []
@@ -830,13 +1617,14 @@ def generate_insights(filtered_df, filtered_hourly_df, new_devices_today, new_de
             insights.append(f"{emoji} New Devices {'+' if nd_change > 0 else ''}{nd_change:.1f}% - {new_devices_today:,.0f} today")
     
     # Top performing feature
-    top_feature = filtered_df.groupby('feature')['revenue_today'].sum().idxmax()
-    top_revenue = filtered_df.groupby('feature')['revenue_today'].sum().max()
+    top_feature = filtered_df.groupby('feature', observed=True)['revenue_today'].sum().idxmax()
+    top_revenue = filtered_df.groupby('feature', observed=True)['revenue_today'].sum().max()
     insights.append(f"⭐ Top feature: {top_feature} (${top_revenue:,.2f})")
     
     return insights
 
-def render_overview_tab(filtered_df, filtered_hourly_df=None, israel_time=True, new_devices_hourly=None):
+@profiled
+def render_overview_tab(filtered_df, filtered_hourly_df=None, israel_time=True, new_devices_hourly=None, hourly_charts=None):
     """Render the overview tab with key metrics, data table, and hourly charts"""
     # Calculate totals
     revenue_today = filtered_df['revenue_today'].sum()
@@ -939,30 +1727,17 @@ def render_overview_tab(filtered_df, filtered_hourly_df=None, israel_time=True,
     # Show data table
     st.subheader("📋 Detailed Data")
     
-    # Create a copy for display
-    display_df = filtered_df.copy()
-    
-    # Format columns
-    for col in display_df.columns:
-        if 'pct_diff' in col:
-            display_df[col] = display_df[col].apply(lambda x: f"{x:+.1f}%" if pd.notnull(x) else "N/A")
-        elif 'revenue' in col:
-            display_df[col] = display_df[col].apply(lambda x: f"${x:,.2f}" if pd.notnull(x) else "N/A")
-        elif pd.api.types.is_numeric_dtype(display_df[col]):
-            display_df[col] = display_df[col].apply(lambda x: f"{x:,.0f}" if pd.notnull(x) else "N/A")
-    
-    st.dataframe(display_df, use_container_width=True, height=400)
-    
-    # Export button
-    excel_data = export_to_excel(filtered_df)
-    st.download_button(
-        label="📥 Download Excel",
-        data=excel_data,
-        file_name=f"aura_data_{dt.now().strftime('%Y%m%d_%H%M')}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        use_container_width=False
+    # Values stay numeric (and sort numerically); the browser formats them per column
+    st.dataframe(
+        filtered_df,
+        use_container_width=True,
+        height=400,
+        column_config=detailed_data_column_config(filtered_df),
     )
     
+    # Export (built only on request, then cached by content)
+    render_export_controls(filtered_df, filtered_hourly_df, new_devices_hourly)
+    
     # Add hourly performance charts
     if filtered_hourly_df is not None and not filtered_hourly_df.empty:
         st.markdown("---")
@@ -970,36 +1745,43 @@ def render_overview_tab(filtered_df, filtered_hourly_df=None, israel_time=True,
         st.caption("Key metrics by hour - Today vs Last Week")
         
         # Display charts vertically for better visibility
-        plot_hourly_comparison(filtered_hourly_df, 'revenue', '💰 Revenue by Hour', 'Revenue ($)', israel_time, 'overview_revenue', new_devices_hourly)
-        plot_hourly_comparison(filtered_hourly_df, 'notif', '🔔 Notifications by Hour', 'Notifications', israel_time, 'overview_notif', new_devices_hourly)
-        plot_hourly_comparison(filtered_hourly_df, 'new_devices', '📱 New Devices by Hour', 'New Devices', israel_time, 'overview_new_devices', new_devices_hourly)
+        if hourly_charts is None:
+            hourly_charts = prepare_hourly_charts(filtered_hourly_df, new_devices_hourly)
+        plot_hourly_comparison(hourly_charts, 'revenue', '💰 Revenue by Hour', 'Revenue ($)', israel_time, 'overview_revenue')
+        plot_hourly_comparison(hourly_charts, 'notif', '🔔 Notifications by Hour', 'Notifications', israel_time, 'overview_notif')
+        plot_hourly_comparison(hourly_charts, 'new_devices', '📱 New Devices by Hour', 'New Devices', israel_time, 'overview_new_devices')
 
-def render_hourly_tab(filtered_hourly_df, israel_time=True):
+@profiled
+def render_hourly_tab(filtered_hourly_df, israel_time=True, hourly_charts=None):
     """Render the hourly trends tab with interactive charts"""
     if filtered_hourly_df.empty:
         st.warning("No hourly data available.")
         return
     
+    if hourly_charts is None:
+        hourly_charts = prepare_hourly_charts(filtered_hourly_df)
+    
     st.subheader("📈 Hourly Trends")
     
     # Create two columns for charts
     col1, col2 = st.columns(2)
     
     with col1:
-        plot_hourly_comparison(filtered_hourly_df, 'revenue', '💰 Revenue by Hour', 'Revenue ($)', israel_time, 'hourly_revenue')
-        plot_hourly_comparison(filtered_hourly_df, 'exp', '👁️ Experiences by Hour', 'Experiences', israel_time, 'hourly_exp')
+        plot_hourly_comparison(hourly_charts, 'revenue', '💰 Revenue by Hour', 'Revenue ($)', israel_time, 'hourly_revenue')
+        plot_hourly_comparison(hourly_charts, 'exp', '👁️ Experiences by Hour', 'Experiences', israel_time, 'hourly_exp')
     
     with col2:
-        plot_hourly_comparison(filtered_hourly_df, 'notif', '🔔 Notifications by Hour', 'Notifications', israel_time, 'hourly_notif')
-        plot_hourly_comparison(filtered_hourly_df, 'install', '📥 Installs by Hour', 'Installs', israel_time, 'hourly_install')
+        plot_hourly_comparison(hourly_charts, 'notif', '🔔 Notifications by Hour', 'Notifications', israel_time, 'hourly_notif')
+        plot_hourly_comparison(hourly_charts, 'install', '📥 Installs by Hour', 'Installs', israel_time, 'hourly_install')
 
+@profiled
 def render_comparison_tab(filtered_df):
     """Render the comparison tab with brand/feature breakdowns"""
     st.subheader("📊 Brand & Feature Comparison")
     
     # Brand comparison
     st.markdown("### By Brand")
-    brand_summary = filtered_df.groupby('brand').agg({
+    brand_summary = filtered_df.groupby('brand', observed=True).agg({
         'revenue_today': 'sum',
         'revenue_last_week': 'sum',
         'notif_today': 'sum',
@@ -1022,7 +1804,7 @@ def render_comparison_tab(filtered_df):
     
     # Feature comparison
     st.markdown("### By Feature")
-    feature_summary = filtered_df.groupby('feature').agg({
+    feature_summary = filtered_df.groupby('feature', observed=True).agg({
         'revenue_today': 'sum',
         'revenue_last_week': 'sum',
         'notif_today': 'sum',
@@ -1043,6 +1825,7 @@ def render_comparison_tab(filtered_df):
     fig.update_layout(height=400, plot_bgcolor='white', paper_bgcolor='white')
     st.plotly_chart(fig, use_container_width=True)
 
+@profiled
 def render_dashboard(df, hourly_df, is_real_data, new_devices_hourly=None):
     """Render the enhanced dashboard with filters and charts"""
     st.title("📊 Aura Dashboard")
@@ -1052,7 +1835,9 @@ def render_dashboard(df, hourly_df, is_real_data, new_devices_hourly=None):
     with col1:
         st.caption(f"Last updated: {dt.now().strftime('%Y-%m-%d %H:%M')}")
     with col2:
-        if is_real_data:
+        if is_real_data and DB_BACKEND == 'duckdb':
+            st.info("🧪 Local DuckDB", icon="🦆")
+        elif is_real_data:
             st.success("🟢 Live Data", icon="✅")
         else:
             st.warning("🟡 Sample Data", icon="⚠️")
@@ -1077,13 +1862,19 @@ def render_dashboard(df, hourly_df, is_real_data, new_devices_hourly=None):
             help="Convert hourly data to Israel timezone"
         )
         
-        # Add refresh button
+        # Add refresh button (incremental: only hours after the last load are re-queried)
         if st.button("🔄 Refresh Data", use_container_width=True):
-            # Clear both cache and session state
+            # Clear the query cache and session state, keep the incremental scan cache
+            clear_data_cache()
+            get_session_frames().clear()
+            st.rerun()
+        
+        if st.button("♻️ Full Reload", use_container_width=True, help="Discard cached results and re-query everything"):
             st.cache_data.clear()
-            for key in ['df', 'hourly_df', 'is_real_data', 'new_devices_hourly']:
-                if key in st.session_state:
-                    del st.session_state[key]
+            get_cached_loads().clear()
+            get_scan_cache().invalidate()
+            get_last_week_cache().invalidate()
+            get_session_frames().clear()
             st.rerun()
         
         # Add some space
@@ -1094,27 +1885,47 @@ def render_dashboard(df, hourly_df, is_real_data, new_devices_hourly=None):
         st.caption(f"Total Rows: {len(df):,}")
         st.caption(f"Brands: {len(df['brand'].unique())}")
         st.caption(f"Features: {len(df['feature'].unique())}")
-    
+        if USE_ROLLUP:
+            st.caption(f"Reading: {load_table()}")
+        session_frames = get_session_frames()
+        st.caption(f"Session memory: {session_frames.nbytes / 1024 ** 2:,.1f} / {SESSION_MEMORY_MB:,} MB ({len(session_frames)} load(s))")
+
+        # Show shared connection pool usage
+        if is_real_data:
+            with st.expander("🔌 Connection Pool"):
+                pool_stats = get_connection_pool().stats()
+                st.caption(f"In use: {pool_stats['in_use']}/{pool_stats['maxconn']} (peak {pool_stats['peak_in_use']})")
+                st.caption(f"Idle: {pool_stats['idle']} · Opened: {pool_stats['created']} · Closed: {pool_stats['closed']}")
+                st.caption(f"Checkouts: {pool_stats['checkouts']:,} · Waits: {pool_stats['waits']:,} · Timeouts: {pool_stats['timeouts']:,}")
+        
+        if PERFORMANCE_PANEL:
+            render_performance_panel()
+
     # Data is already filtered by the query
-    filtered_df = df.copy()
-    filtered_hourly_df = hourly_df.copy() if not hourly_df.empty else pd.DataFrame()
+    filtered_df = df
+    filtered_hourly_df = hourly_df if not hourly_df.empty else pd.DataFrame()
     
     # Show warning if no data
     if filtered_df.empty:
         st.warning("⚠️ No data available for the selected filters.")
         return
     
+    # Aggregate by hour once; both tabs draw their charts from the same totals
+    hourly_charts = prepare_hourly_charts(filtered_hourly_df, new_devices_hourly)
+    
     # Create tabs for different views
     tab1, tab2 = st.tabs(["📊 Overview", "📈 Hourly Trends"])
     
     with tab1:
-        render_overview_tab(filtered_df, filtered_hourly_df, use_israel_time, new_devices_hourly)
+        render_overview_tab(filtered_df, filtered_hourly_df, use_israel_time, new_devices_hourly, hourly_charts)
     
     with tab2:
-        render_hourly_tab(filtered_hourly_df, use_israel_time)
+        render_hourly_tab(filtered_hourly_df, use_israel_time, hourly_charts)
 
 def main():
     """Main function to run the Streamlit app"""
+    # Every open session is counted in the metrics (and the endpoint starts with the first one)
+    get_session_frames()
     try:
         # Get filters BEFORE loading data for efficiency
         with st.sidebar:
@@ -1192,13 +2003,23 @@ def main():
                 help="Click to run the query with selected filters"
             )
             
-            if load_data:
+            # Filter changes inside a loaded cube apply instantly, without a round trip
+            cube_covers_selection = (
+                st.session_state.get('data_loaded', False)
+                and find_covering_cube(selected_source, selected_brands, selected_features) is not None
+            )
+            
+            if load_data or cube_covers_selection:
                 # Store in session state
                 st.session_state['selected_source'] = selected_source
                 st.session_state['selected_brands'] = selected_brands
                 st.session_state['selected_features'] = selected_features
                 st.session_state['combine_brands'] = combine_brands
                 st.session_state['data_loaded'] = True
+                
+                # A selection outside every loaded cube needs a new query
+                if not cube_covers_selection:
+                    get_session_frames().discard(selection_key(selected_source, selected_brands, selected_features))
         
         # Check if we should load data
         if not st.session_state.get('data_loaded', False):
@@ -1211,54 +2032,57 @@ def main():
         selected_features = st.session_state.get('selected_features', FEATURES)
         combine_brands = st.session_state.get('combine_brands', False)
         
-        # Check if we already have data in session state
-        if 'df' in st.session_state and not st.session_state['df'].empty:
+        session_frames = get_session_frames()
+        key = selection_key(selected_source, selected_brands, selected_features)
+        loaded = find_covering_cube(selected_source, selected_brands, selected_features)
+        if loaded is None:
+            loaded = session_frames.get(key)
+        
+        if loaded is not None and loaded.get('cube') is not None:
+            # Slice the selection out of the in-memory cube (milliseconds, no query)
+            st.sidebar.success("⚡ Filtering in-memory data")
+            df, hourly_df, new_devices_hourly = cube_frames(loaded['cube'], selected_source, selected_brands, selected_features)
+            is_real_data = loaded['is_real_data']
+        elif loaded is not None and not loaded['df'].empty:
             # Use cached data from session state
             st.sidebar.success("✅ Using cached data")
-            df = st.session_state['df']
-            hourly_df = st.session_state.get('hourly_df', pd.DataFrame())
-            is_real_data = st.session_state.get('is_real_data', False)
-            new_devices_hourly = st.session_state.get('new_devices_hourly', None)
+            df = loaded['df']
+            hourly_df = loaded['hourly_df']
+            is_real_data = loaded['is_real_data']
+            new_devices_hourly = loaded['new_devices_hourly']
         else:
+            # Estimate the load first when the preflight is on; it may be routed or wait for confirmation
+            route = None
+            if PREFLIGHT_MODE:
+                allowed, route = preflight_load(selected_source, selected_brands, selected_features)
+                if not allowed:
+                    return
+            
             # Load the data with selected filters (first time only)
             st.sidebar.info("🔄 Loading fresh data...")
-            with st.spinner(f'Loading data for {len(selected_brands)} brand(s) × {len(selected_features)} feature(s)...'):
-                df, is_real_data = get_data(selected_source, selected_brands, selected_features)
-                
-                # Get hourly data for charts
-                hourly_df = pd.DataFrame()
-                new_devices_hourly = None
-                try:
-                    conn = get_connection()
-                    if conn:
-                        hourly_df = pd.read_sql(build_hourly_query(selected_source, selected_brands, selected_features), conn)
-                        
-                        # Get new_devices hourly separately (not grouped by feature)
-                        try:
-                            new_devices_hourly = pd.read_sql(build_new_devices_hourly_query(selected_source, selected_brands, selected_features), conn)
-                        except Exception as e:
-                            new_devices_hourly = None
-                        
-                        conn.close()
-                except Exception as e:
-                    st.sidebar.warning(f"⚠️ Could not load hourly data: {str(e)}")
+            with st.spinner(f'Loading data for {len(selected_brands)} brand(s) × {len(selected_features)} feature(s)...'), render_profiler.stage('get_data'), get_metrics().cached_call('get_data'):
+                df, hourly_df, new_devices_hourly, is_real_data, cube = get_data(selected_source, selected_brands, selected_features, route)
             
-                # Apply aggregation if requested (before rendering)
-                if combine_brands and len(selected_brands) > 1 and not df.empty:
-                    st.info(f"📊 Showing combined view of {len(selected_brands)} brands: {', '.join(selected_brands[:3])}{'...' if len(selected_brands) > 3 else ''}")
-                    df = aggregate_brands_data(df, selected_brands)
-                    if not hourly_df.empty:
-                        hourly_df = aggregate_hourly_data(hourly_df, selected_brands)
-            
-                # Store data in session state
-                st.session_state['df'] = df
-                st.session_state['hourly_df'] = hourly_df
-                st.session_state['is_real_data'] = is_real_data
-                st.session_state['new_devices_hourly'] = new_devices_hourly
+            # Store data in session state (the cube alone is enough to rebuild every frame)
+            if cube is not None:
+                session_frames.put(key, {'cube': cube, 'is_real_data': is_real_data})
+            else:
+                session_frames.put(key, {
+                    'df': df, 'hourly_df': hourly_df, 'new_devices_hourly': new_devices_hourly,
+                    'is_real_data': is_real_data,
+                })
+        
+        # Apply aggregation if requested (before rendering)
+        if combine_brands and len(selected_brands) > 1 and not df.empty:
+            st.info(f"📊 Showing combined view of {len(selected_brands)} brands: {', '.join(selected_brands[:3])}{'...' if len(selected_brands) > 3 else ''}")
+            df = aggregate_brands_data(df, selected_brands)
+            if not hourly_df.empty:
+                hourly_df = aggregate_hourly_data(hourly_df, selected_brands)
         
         # Render the dashboard
         if not df.empty:
             render_dashboard(df, hourly_df, is_real_data, new_devices_hourly)
+            render_extract_panel(selected_source, selected_brands, selected_features)
         else:
             st.error("No data available. Please check your database connection.")
             
@@ -1266,5 +2090,34 @@ def main():
         st.error(f"An error occurred: {str(e)}")
         st.exception(e)  # Show full error details for debugging
 
+def render_profile_report():
+    """Finish this rerun's profile (when profiling is on), save it and show its waterfall"""
+    profiler = render_profiler.stop()
+    if profiler is None:
+        return
+    try:
+        paths = profiler.dump(PROFILE_DIR)
+    except OSError as e:
+        paths = []
+        st.warning(f"⚠️ Could not write the render profile: {str(e)}")
+    
+    st.markdown("---")
+    st.subheader("🔬 Render Profile")
+    st.caption(f"Rerun took {profiler.total_ms:,.0f} ms · profiling mode: {profiler.mode}")
+    st.plotly_chart(profiler.waterfall(), use_container_width=True, key="render_profile_waterfall")
+    with st.expander("Stage timings"):
+        st.dataframe(profiler.frame().round(1), hide_index=True, use_container_width=True)
+    for path in paths:
+        with open(path, 'rb') as f:
+            st.download_button(f"📥 {os.path.basename(path)}", data=f, file_name=os.path.basename(path), key=f"render_profile_{os.path.splitext(path)[1]}")
+    if paths:
+        st.caption(f"Saved to {PROFILE_DIR}")
+
 if __name__ == "__main__":
-    main()
+    try:
+        with render_profiler.stage('main'):
+            main()
+        render_profile_report()
+    finally:
+        # st.rerun(), st.stop() and errors end the script early; never leave the profiler running
+        render_profiler.stop()
@@ -0,0 +1,217 @@
+"""Benchmark: dashboard code paths on synthetic data of increasing size
+
+Times the query builders, brand/hourly aggregation, insights, hourly chart figure
+construction and the Excel exports on synthetic_data frames, recording the best wall time
+and the peak traced memory of each case. Results are compared against a stored baseline
+(benchmarks/baseline_dashboard.json); record a new one after intended changes.
+
+Each run also times a fixed calibration workload, and baseline times are scaled by how much
+faster or slower it ran than when the baseline was recorded, so a busy or different machine
+does not show up as a regression. Differences under NOISE_FLOOR_SECONDS never count.
+
+    python benchmarks/bench_dashboard.py                    # run and compare with the baseline
+    python benchmarks/bench_dashboard.py --sizes medium,xlarge --repeat 10
+    python benchmarks/bench_dashboard.py --save-baseline    # record the current numbers
+
+To re-baseline, run with --save-baseline --repeat 10 on an otherwise idle machine and commit
+baseline_dashboard.json. Only the sizes that were run are replaced, each with the
+calibration time of its own run.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import warnings
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_fetch import measure  # noqa: E402
+
+with warnings.catch_warnings():
+    # Streamlit warns about the missing script run context outside `streamlit run`
+    warnings.simplefilter('ignore')
+    import aura_dashboard as ad  # noqa: E402
+from exporters import build_export  # noqa: E402
+from synthetic_data import synthetic_dashboard_frames  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_dashboard.json')
+
+# name -> (brands, features); summary rows = brands × features, hourly rows × 24
+SIZES = {
+    'small': (10, 3),
+    'medium': (62, 7),
+    'large': (250, 20),
+    'xlarge': (1000, 40),
+}
+
+# Differences below this are timer noise, not regressions
+NOISE_FLOOR_SECONDS = 0.005
+
+
+def dataset(size, seed=0):
+    """Synthetic dashboard frames and the brand/feature names they were generated for"""
+    n_brands, n_features = SIZES[size]
+    brands = [f"brand_{i:04d}" for i in range(n_brands)]
+    features = [f"feature_{i:04d}" for i in range(n_features)]
+    df, hourly_df, (new_devices_today, new_devices_last_week), new_devices_hourly = synthetic_dashboard_frames(
+        brands, features, through_hour=23, seed=seed
+    )
+    ad.set_new_devices_attrs(df, new_devices_today, new_devices_last_week)
+    return {
+        'brands': brands,
+        'features': features,
+        'df': df,
+        'hourly_df': hourly_df,
+        'new_devices_hourly': new_devices_hourly,
+        'new_devices': (new_devices_today, new_devices_last_week),
+    }
+
+
+def build_queries(data):
+    brands, features = data['brands'], data['features']
+    today = date.today()
+    return [
+        ad.build_sql_query('pre-install', brands, features),
+        ad.build_new_devices_query(brands, 'pre-install', features),
+        ad.build_new_devices_hourly_query('pre-install', brands, features),
+        ad.build_hourly_query('pre-install', brands, features),
+        ad.build_single_scan_query('pre-install', brands, features),
+        ad.build_raw_extract_query('pre-install', brands, features, today - timedelta(days=7), today),
+    ]
+
+
+def hourly_figures(data):
+    """Every hourly chart the two tabs draw, built uncached"""
+    hourly_charts = ad.prepare_hourly_charts(data['hourly_df'], data['new_devices_hourly'])
+    build = ad.hourly_figure_spec.__wrapped__
+    charts = [
+        ('revenue', 'Revenue by Hour', 'Revenue ($)'),
+        ('notif', 'Notifications by Hour', 'Notifications'),
+        ('exp', 'Experiences by Hour', 'Experiences'),
+        ('install', 'Installs by Hour', 'Installs'),
+        ('new_devices', 'New Devices by Hour', 'New Devices'),
+    ]
+    figures = []
+    for metric, title, y_axis_label in charts:
+        frame = hourly_charts['frames']['new_devices' if metric == 'new_devices' else 'by_hour']
+        figures.append(build(hourly_charts['key'], metric, title, y_axis_label, True, 23, frame))
+    return figures
+
+
+CASES = {
+    'build_queries': build_queries,
+    'aggregate_brands_data': lambda data: ad.aggregate_brands_data(data['df'], data['brands']),
+    'aggregate_hourly_data': lambda data: ad.aggregate_hourly_data(data['hourly_df'], data['brands']),
+    'generate_insights': lambda data: ad.generate_insights(data['df'], data['hourly_df'], *data['new_devices']),
+    'hourly_figures': hourly_figures,
+    'export_to_excel': lambda data: ad.export_to_excel(data['df']),
+    'build_export_xlsx': lambda data: build_export({'Aura Data': data['df']}, 'xlsx'),
+}
+
+
+def calibration_workload():
+    """A fixed mix of pandas group-bys and plain Python, like the cases being timed"""
+    frame = pd.DataFrame({'key': [i % 97 for i in range(200000)], 'value': range(200000)})
+    frame.groupby('key')['value'].agg(['sum', 'mean'])
+    return sum(i * i for i in range(200000))
+
+
+def calibrate(repeat):
+    """Best seconds of the calibration workload on this machine right now"""
+    seconds = min(measure(calibration_workload, 1)[0] for _ in range(repeat))
+    print(f"Calibration: {seconds * 1000:.1f} ms")
+    return seconds
+
+
+def run(sizes, repeat):
+    """{'case/size': {'seconds': best, 'peak_mb': peak, 'rows': summary rows, 'calibration_seconds': c}}"""
+    results = {}
+    calibration = calibrate(repeat)
+    for size in sizes:
+        data = dataset(size)
+        print(f"\n{size}: {len(data['df']):,} summary rows, {len(data['hourly_df']):,} hourly rows")
+        for case, fn in CASES.items():
+            seconds, peak, _ = measure(lambda: fn(data), repeat)
+            results[f"{case}/{size}"] = {
+                'seconds': seconds, 'peak_mb': peak, 'rows': len(data['df']), 'calibration_seconds': calibration,
+            }
+            print(f"  {case:24s} {seconds * 1000:10.1f} ms   peak {peak:8.1f} MB")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print current vs baseline per case; return the cases slower than `tolerance` allows
+
+    Baseline times are scaled by current / baseline calibration time (1 for baselines
+    recorded without one).
+    """
+    regressions = []
+    print(f"\n{'case':36s} {'expected':>11s} {'current':>11s} {'time':>8s} {'peak MB':>17s}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:36s} {'-':>11s} {current['seconds'] * 1000:9.1f}ms {'new':>8s}")
+            continue
+        scale = current['calibration_seconds'] / base['calibration_seconds'] if base.get('calibration_seconds') else 1
+        expected = base['seconds'] * scale
+        ratio = current['seconds'] / expected if expected else float('inf')
+        slower = current['seconds'] - expected > NOISE_FLOOR_SECONDS and ratio > 1 + tolerance
+        flag = "  REGRESSION" if slower else ""
+        print(
+            f"{name:36s} {expected * 1000:9.1f}ms {current['seconds'] * 1000:9.1f}ms {ratio:7.2f}x "
+            f"{base['peak_mb']:8.1f} → {current['peak_mb']:6.1f}{flag}"
+        )
+        if slower:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='small,medium,large', help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=1.0, help="allowed slowdown before a case counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    results = run(sizes, args.repeat)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f).get('results', {})
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'machine': platform.machine(),
+                'results': baseline,
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; record one with --save-baseline")
+        return
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f)['results'], args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}")
+        sys.exit(1)
+    print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark: columnar_fetch.fetch_columnar vs pd.read_sql
+
+Runs offline against in-memory SQLite and DuckDB tables shaped like the single-scan
+result (DuckDB returns the revenue sums as Decimal, like Redshift NUMERIC). With
+--live, also times the real single-scan query on the configured Redshift connection.
+
+    python benchmarks/bench_fetch.py --rows 200000
+    python benchmarks/bench_fetch.py --live
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from columnar_fetch import fetch_columnar  # noqa: E402
+
+SELECT = "SELECT source, brand, feature, hour_of_day, period, revenue, notif, exp, install, new_devices FROM scan"
+
+
+def synthetic_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'source': rng.choice(['s1', 's2', 's3'], n),
+        'brand': rng.choice([f'brand_{i}' for i in range(62)], n),
+        'feature': rng.choice(['oobe', 'silent', 'gotw'], n),
+        'hour_of_day': rng.integers(0, 24, n),
+        'period': rng.choice(['today', 'last_week'], n),
+        'revenue': rng.gamma(2.0, 50.0, n).round(4),
+        'notif': rng.integers(0, 10000, n),
+        'exp': rng.integers(0, 5000, n),
+        'install': rng.integers(0, 500, n),
+        'new_devices': rng.integers(0, 300, n),
+    })
+
+
+def sqlite_connection(df):
+    conn = sqlite3.connect(':memory:')
+    df.to_sql('scan', conn, index=False)
+    return conn
+
+
+def duckdb_connection(df):
+    import duckdb
+    conn = duckdb.connect()
+    conn.register('rows_df', df)
+    conn.execute("CREATE TABLE scan AS SELECT * EXCLUDE (revenue), CAST(revenue AS DECIMAL(18, 4)) AS revenue FROM rows_df")
+    return conn
+
+
+def measure(fn, repeat):
+    """(best seconds, peak traced MB, result) over `repeat` runs"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def compare(label, sql, conn, repeat):
+    with warnings.catch_warnings():
+        # pandas only officially supports SQLAlchemy/sqlite3 connections in read_sql
+        warnings.simplefilter('ignore', UserWarning)
+        base_time, base_peak, base = measure(lambda: pd.read_sql(sql, conn), repeat)
+    fast_time, fast_peak, fast = measure(lambda: fetch_columnar(sql, conn), repeat)
+
+    print(f"\n{label}: {len(fast):,} rows")
+    print(f"  pd.read_sql      {base_time * 1000:9.1f} ms   peak {base_peak:7.1f} MB   {base.memory_usage(deep=True).sum() / 1024 ** 2:7.1f} MB result")
+    print(f"  fetch_columnar   {fast_time * 1000:9.1f} ms   peak {fast_peak:7.1f} MB   {fast.memory_usage(deep=True).sum() / 1024 ** 2:7.1f} MB result")
+    print(f"  speedup          {base_time / fast_time:9.2f}x")
+    object_columns = [c for c in base.columns if base[c].dtype == object and fast[c].dtype != object]
+    if object_columns:
+        print(f"  read_sql left as object dtype: {', '.join(object_columns)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--live', action='store_true', help="also benchmark the single-scan query on the configured database (AURA_DB_BACKEND)")
+    args = parser.parse_args()
+
+    df = synthetic_rows(args.rows)
+    compare("SQLite (no type codes, inferred)", SELECT, sqlite_connection(df), args.repeat)
+    try:
+        compare("DuckDB (DECIMAL revenue)", SELECT, duckdb_connection(df), args.repeat)
+    except ImportError:
+        print("\nDuckDB not installed, skipping")
+
+    if args.live:
+        from aura_dashboard import BRANDS, DB_BACKEND, FEATURES, build_single_scan_query, create_connection
+        conn = create_connection()
+        try:
+            compare(f"Single-scan ({DB_BACKEND})", build_single_scan_query(None, BRANDS, FEATURES), conn, args.repeat)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Columnar result fetching: decode DB-API rows straight into typed NumPy column buffers
+
+pd.read_sql hands every row to pandas as a Python tuple and lets it infer dtypes from
+the objects, and NUMERIC sums arrive as Decimal objects that stay `object` dtype.
+fetch_columnar() instead reads the cursor in fixed-size chunks and copies each chunk
+column-wise into NumPy arrays whose dtype comes from the column's database type
+(NUMERIC is converted to float in the driver, so no Decimal objects are created).
+Cursors that can return Arrow tables directly (DuckDB, ADBC drivers) are read as Arrow.
+
+stream_query()/iter_stream() are the bounded-memory variants for large pulls: they read
+through a named server-side cursor, so only one chunk of rows is ever held client-side.
+"""
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+try:
+    import psycopg2.extensions
+    _NUMERIC_AS_FLOAT = psycopg2.extensions.new_type(
+        psycopg2.extensions.DECIMAL.values,
+        'AURA_NUMERIC_AS_FLOAT',
+        lambda value, cur: float(value) if value is not None else None,
+    )
+except ImportError:  # pragma: no cover - psycopg2 is a hard requirement of the dashboard
+    psycopg2 = None
+    _NUMERIC_AS_FLOAT = None
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# PostgreSQL/Redshift type OIDs -> NumPy dtype of the column buffer
+_OID_DTYPES = {
+    16: 'bool',                                   # bool
+    20: 'int64', 21: 'int64', 23: 'int64',        # int8, int2, int4
+    700: 'float64', 701: 'float64', 1700: 'float64',  # float4, float8, numeric
+    1082: 'datetime64[ns]', 1114: 'datetime64[ns]', 1184: 'datetime64[ns]',  # date, timestamp(tz)
+}
+
+
+def _column_dtype(type_code):
+    """NumPy dtype for a cursor.description type_code, or None to infer from the values"""
+    if isinstance(type_code, int):
+        return _OID_DTYPES.get(type_code, 'object')
+    return None
+
+
+def _infer_dtype(values):
+    """Dtype for drivers that do not report type codes, from the first non-null value"""
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            return 'bool'
+        if isinstance(value, int):
+            return 'int64'
+        if isinstance(value, float):
+            return 'float64'
+        if hasattr(value, 'as_tuple'):  # Decimal
+            return 'float64'
+        return 'object'
+    return 'object'
+
+
+def _decode(values, dtype):
+    """Copy one chunk of a column into a typed array, or an object array if it does not fit"""
+    if dtype == 'object':
+        return np.array(values, dtype=object), True
+    try:
+        return np.array(values, dtype=dtype), True
+    except (TypeError, ValueError):
+        # NULLs (None) in an integer/bool/date column
+        return np.array(values, dtype=object), False
+
+
+def _finalize(chunks, dtype, typed):
+    """Join a column's chunks into one array; columns with NULLs become float64/NaN like read_sql"""
+    if not chunks:
+        return np.empty(0, dtype=dtype)
+    if typed:
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+    values = np.concatenate([c.astype(object) for c in chunks])
+    if dtype == 'datetime64[ns]':
+        return pd.to_datetime(values).to_numpy()
+    return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype='float64')
+
+
+def _from_arrow(cur):
+    """Drivers with native Arrow results (DuckDB, ADBC) skip Python row objects entirely"""
+    import pyarrow as pa
+    table = cur.fetch_arrow_table()
+    schema = pa.schema([
+        field.with_type(pa.float64()) if pa.types.is_decimal(field.type) else field
+        for field in table.schema
+    ])
+    return table.cast(schema).to_pandas(split_blocks=True)
+
+
+def _add_time(timings, name, started):
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def fetch_columnar(sql, conn, chunk_size=DEFAULT_CHUNK_SIZE, timings=None):
+    """Execute `sql` on a DB-API connection and return a DataFrame built from column buffers
+
+    With a `timings` dict, seconds spent executing and fetching are added to its
+    'execute' and 'fetch' entries.
+    """
+    cur = conn.cursor()
+    try:
+        if _NUMERIC_AS_FLOAT is not None and isinstance(cur, psycopg2.extensions.cursor):
+            psycopg2.extensions.register_type(_NUMERIC_AS_FLOAT, cur)
+        started = time.perf_counter()
+        cur.execute(sql)
+        _add_time(timings, 'execute', started)
+        started = time.perf_counter()
+        if cur.description is None:
+            return pd.DataFrame()
+        if hasattr(cur, 'fetch_arrow_table'):
+            df = _from_arrow(cur)
+            _add_time(timings, 'fetch', started)
+            return df
+
+        names = [d[0] for d in cur.description]
+        dtypes = [_column_dtype(d[1]) for d in cur.description]
+        chunks = [[] for _ in names]
+        typed = [True] * len(names)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            for i, values in enumerate(zip(*rows)):
+                if dtypes[i] is None:
+                    dtypes[i] = _infer_dtype(values)
+                array, ok = _decode(values, dtypes[i])
+                chunks[i].append(array)
+                typed[i] = typed[i] and ok
+    finally:
+        cur.close()
+
+    df = pd.DataFrame(
+        {name: _finalize(chunks[i], dtypes[i] or 'object', typed[i]) for i, name in enumerate(names)},
+        copy=False,
+    )
+    _add_time(timings, 'fetch', started)
+    return df
+
+
+def _chunk_frame(names, dtypes, rows):
+    """DataFrame for one fetched chunk, inferring still-unknown dtypes from it"""
+    data = {}
+    for i, values in enumerate(zip(*rows)):
+        if dtypes[i] is None:
+            dtypes[i] = _infer_dtype(values)
+        array, ok = _decode(values, dtypes[i])
+        data[names[i]] = _finalize([array], dtypes[i], ok)
+    return pd.DataFrame(data, copy=False)
+
+
+class FetchProgress:
+    """Thread-safe count of rows fetched so far, shared by concurrently streaming queries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rows = 0
+
+    def add(self, n):
+        with self._lock:
+            self.rows += n
+
+
+def iter_stream(sql, conn, chunk_size=DEFAULT_CHUNK_SIZE, timings=None):
+    """Yield DataFrames of up to `chunk_size` rows read through a named server-side cursor
+
+    Only the current chunk is held client-side. A result without rows yields one empty
+    frame with the column names. Closing the generator early (e.g. on cancellation)
+    closes the cursor and ends its transaction. `timings` works as in fetch_columnar
+    (a named cursor runs the query on its first FETCH, which counts as fetching).
+    """
+    autocommit = conn.autocommit
+    # Named cursors only live inside a transaction (Redshift has no WITH HOLD cursors)
+    conn.autocommit = False
+    cur = conn.cursor(name=f"aura_stream_{uuid.uuid4().hex[:12]}")
+    try:
+        if _NUMERIC_AS_FLOAT is not None and isinstance(cur, psycopg2.extensions.cursor):
+            psycopg2.extensions.register_type(_NUMERIC_AS_FLOAT, cur)
+        started = time.perf_counter()
+        cur.execute(sql)
+        _add_time(timings, 'execute', started)
+
+        names = dtypes = None
+        while True:
+            started = time.perf_counter()
+            rows = cur.fetchmany(chunk_size)
+            _add_time(timings, 'fetch', started)
+            if names is None:
+                # A named cursor only knows its columns after the first FETCH
+                names = [d[0] for d in cur.description]
+                dtypes = [_column_dtype(d[1]) for d in cur.description]
+                if not rows:
+                    yield pd.DataFrame(columns=names)
+            if not rows:
+                break
+            yield _chunk_frame(names, dtypes, rows)
+    finally:
+        _end_stream(conn, cur, autocommit)
+
+
+def stream_query(sql, conn, chunk_size=DEFAULT_CHUNK_SIZE, transform=None, progress=None, timings=None):
+    """Fetch `sql` through a named server-side cursor, `chunk_size` rows at a time
+
+    Each chunk frame is passed through `transform` (e.g. a compact dtype cast) as it
+    arrives, so only the transformed chunks are kept, and they are concatenated at the
+    end. `progress` (a FetchProgress) is advanced after every chunk; `timings` as in
+    fetch_columnar.
+    """
+    parts = []
+    for chunk in iter_stream(sql, conn, chunk_size, timings):
+        parts.append(transform(chunk) if transform is not None else chunk)
+        if progress is not None:
+            progress.add(len(chunk))
+    return parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+
+def _end_stream(conn, cur, autocommit):
+    """Close the cursor, end its read-only transaction and restore the connection's mode"""
+    try:
+        cur.close()
+        conn.rollback()
+        conn.autocommit = autocommit
+    except Exception:
+        # Leave nothing half-configured in the pool: a closed connection gets discarded
+        conn.close()
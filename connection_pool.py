@@ -0,0 +1,241 @@
+"""Thread-safe database connection pool shared by every dashboard query path"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Process-wide pool of DB-API connections with min/max sizing, health checks and idle eviction
+
+    `connect` is a zero-argument callable that opens a new connection (or returns None
+    when the database is unreachable). Connections are handed out LIFO so that the
+    busiest ones stay warm and the rest age out through idle eviction.
+    """
+
+    def __init__(self, connect, minconn=1, maxconn=10, max_idle_seconds=300,
+                 checkout_timeout=30, ping_interval=30):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Invalid pool sizing: minconn={minconn}, maxconn={maxconn}")
+
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.max_idle_seconds = max_idle_seconds
+        self.checkout_timeout = checkout_timeout
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = []          # [(conn, last_used_monotonic)], most recently used last
+        self._in_use = {}        # id(conn) -> (conn, checked_out_at)
+        self._opening = 0        # connections currently being opened outside the lock
+        self._closed = False
+        self._stats = {
+            'created': 0,
+            'closed': 0,
+            'evicted_idle': 0,
+            'failed_health_checks': 0,
+            'connect_failures': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'total_wait_seconds': 0.0,
+            'peak_in_use': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Sizing helpers
+    # ------------------------------------------------------------------
+    def _size(self):
+        """Number of open (or opening) connections; caller holds the lock"""
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def _open(self):
+        """Open a new connection via the factory, raising ConnectionError on failure"""
+        try:
+            conn = self._connect()
+        except Exception as e:
+            conn = None
+            error = e
+        else:
+            error = None
+
+        if conn is None:
+            with self._cond:
+                self._opening -= 1
+                self._stats['connect_failures'] += 1
+                self._cond.notify()
+            raise ConnectionError(f"Could not open database connection: {error}" if error
+                                  else "Could not open database connection")
+
+        with self._cond:
+            self._opening -= 1
+            self._stats['created'] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def warm(self):
+        """Open connections until the pool holds at least `minconn` of them"""
+        while True:
+            with self._cond:
+                if self._closed or self._size() >= self.minconn:
+                    return
+                self._opening += 1
+            try:
+                conn = self._open()
+            except ConnectionError:
+                return
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def evict_idle(self):
+        """Close connections idle longer than `max_idle_seconds`, keeping `minconn` open"""
+        now = time.monotonic()
+        to_close = []
+        with self._cond:
+            keep = []
+            # Oldest connections sit at the front of the idle list
+            for conn, last_used in self._idle:
+                expired = now - last_used > self.max_idle_seconds
+                if expired and self._size() - len(to_close) > self.minconn:
+                    to_close.append(conn)
+                else:
+                    keep.append((conn, last_used))
+            self._idle = keep
+            self._stats['evicted_idle'] += len(to_close)
+            self._stats['closed'] += len(to_close)
+        for conn in to_close:
+            self._close_quietly(conn)
+        return len(to_close)
+
+    # ------------------------------------------------------------------
+    # Health checks
+    # ------------------------------------------------------------------
+    def _is_broken(self, conn):
+        return bool(getattr(conn, 'closed', 0))
+
+    def _is_healthy(self, conn, idle_seconds):
+        """Cheap liveness check; only pings connections that sat idle for a while"""
+        if self._is_broken(conn):
+            return False
+        if idle_seconds < self.ping_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            return True
+        except Exception:
+            return False
+
+    # ------------------------------------------------------------------
+    # Checkout / return
+    # ------------------------------------------------------------------
+    def getconn(self):
+        """Check out a healthy connection, opening a new one if below `maxconn`"""
+        self.evict_idle()
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        wait_started = time.monotonic()
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise ConnectionError("Connection pool is closed")
+
+                candidate = None
+                open_new = False
+                while candidate is None and not open_new:
+                    if self._idle:
+                        candidate = self._idle.pop()
+                    elif self._size() < self.maxconn:
+                        self._opening += 1
+                        open_new = True
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats['timeouts'] += 1
+                            raise PoolTimeoutError(
+                                f"No database connection available after {self.checkout_timeout}s "
+                                f"(maxconn={self.maxconn})"
+                            )
+                        if not waited:
+                            waited = True
+                            self._stats['waits'] += 1
+                        self._cond.wait(remaining)
+
+            if open_new:
+                conn = self._open()
+            else:
+                conn, last_used = candidate
+                if not self._is_healthy(conn, time.monotonic() - last_used):
+                    self._close_quietly(conn)
+                    with self._cond:
+                        self._stats['failed_health_checks'] += 1
+                        self._stats['closed'] += 1
+                        self._cond.notify()
+                    continue
+
+            with self._cond:
+                self._in_use[id(conn)] = (conn, time.monotonic())
+                self._stats['checkouts'] += 1
+                self._stats['peak_in_use'] = max(self._stats['peak_in_use'], len(self._in_use))
+                if waited:
+                    self._stats['total_wait_seconds'] += time.monotonic() - wait_started
+            return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool; broken or discarded connections are closed"""
+        with self._cond:
+            self._in_use.pop(id(conn), None)
+            close = discard or self._closed or self._is_broken(conn)
+            if close:
+                self._stats['closed'] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if close:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and always returns it"""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle = []
+            self._stats['closed'] += len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Snapshot of pool sizing and usage counters"""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'minconn': self.minconn,
+                'maxconn': self.maxconn,
+                'size': self._size(),
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'utilization': len(self._in_use) / self.maxconn,
+            })
+        return snapshot
@@ -0,0 +1,120 @@
+"""Derive the dashboard's summary, hourly and new_devices frames from one hourly scan
+
+The single-scan query returns one row per brand × feature × hour × period with the raw
+sums of every metric. Everything the dashboard shows is a local, vectorized reduction of
+that frame, with the same columns, ordering and arithmetic as the original per-view queries.
+"""
+import numpy as np
+import pandas as pd
+
+# Metric column prefixes, in dashboard order. new_devices is reported separately.
+SUMMARY_METRICS = ['revenue', 'notif', 'exp', 'install']
+HOURLY_METRICS = SUMMARY_METRICS + ['new_devices']
+PERIODS = ['today', 'last_week']
+
+RAW_KEYS = ['brand', 'feature', 'hour_of_day', 'period']
+
+
+def _numeric(series):
+    """Decimal/object sums from the driver become float64; numeric dtypes are kept"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series, errors='coerce').astype('float64')
+
+
+def _split_periods(raw, keys):
+    """Sum metrics by `keys` and lay today/last_week side by side (missing side = 0)"""
+    metrics = {m: _numeric(raw[m]) for m in HOURLY_METRICS}
+    frame = pd.DataFrame({**{k: raw[k] for k in keys + ['period']}, **metrics})
+    grouped = frame.groupby(keys + ['period'], sort=False, observed=True)[HOURLY_METRICS].sum()
+    wide = grouped.unstack('period', fill_value=0)
+
+    columns = {}
+    for metric in HOURLY_METRICS:
+        for period in PERIODS:
+            if (metric, period) in wide.columns:
+                columns[f'{metric}_{period}'] = wide[(metric, period)]
+            else:
+                columns[f'{metric}_{period}'] = pd.Series(0, index=wide.index, dtype=frame[metric].dtype)
+    return pd.DataFrame(columns, index=wide.index).reset_index()
+
+
+def _round_half_away(values, decimals=1):
+    """SQL ROUND semantics (half away from zero) rather than numpy's banker's rounding"""
+    factor = 10 ** decimals
+    return np.sign(values) * np.floor(np.abs(values) * factor + 0.5) / factor
+
+
+def pct_diff(today, last_week):
+    """Week-over-week % change exactly as the summary SQL computes it (NULL when last week is 0)
+
+    Integer sums use truncating integer division, like BIGINT arithmetic in Redshift.
+    """
+    today = np.asarray(today)
+    last_week = np.asarray(last_week)
+    valid = last_week > 0
+    divisor = np.where(valid, last_week, 1)
+    if np.issubdtype(today.dtype, np.integer) and np.issubdtype(last_week.dtype, np.integer):
+        ratio = np.fix((today - last_week) / divisor) * 100
+    else:
+        ratio = (today - last_week) / divisor * 100
+    return np.where(valid, _round_half_away(ratio.astype('float64')), np.nan)
+
+
+def derive_summary(raw):
+    """brand × feature totals with diff and pct_diff columns (build_sql_query layout)"""
+    columns = ['brand', 'feature']
+    for metric in SUMMARY_METRICS:
+        columns += [f'{metric}_today', f'{metric}_last_week', f'{metric}_diff', f'{metric}_pct_diff']
+    if raw.empty:
+        return pd.DataFrame(columns=columns)
+
+    wide = _split_periods(raw, ['brand', 'feature'])
+    for metric in SUMMARY_METRICS:
+        today, last_week = wide[f'{metric}_today'], wide[f'{metric}_last_week']
+        wide[f'{metric}_diff'] = today - last_week
+        wide[f'{metric}_pct_diff'] = pct_diff(today, last_week)
+    return wide[columns].sort_values(['brand', 'feature'], kind='stable', ignore_index=True)
+
+
+def derive_hourly(raw):
+    """brand × feature × hour rows, today vs last week (build_hourly_query layout)"""
+    columns = ['brand', 'feature', 'hour_of_day']
+    for metric in HOURLY_METRICS:
+        columns += [f'{metric}_today', f'{metric}_last_week']
+    if raw.empty:
+        return pd.DataFrame(columns=columns)
+
+    wide = _split_periods(raw, ['brand', 'feature', 'hour_of_day'])
+    return wide[columns].sort_values(['hour_of_day', 'brand', 'feature'], kind='stable', ignore_index=True)
+
+
+def derive_new_devices_totals(raw):
+    """(today, last_week) new_devices totals for df.attrs (build_new_devices_query values)"""
+    if raw.empty:
+        return 0, 0
+    totals = _numeric(raw['new_devices']).groupby(raw['period'].to_numpy()).sum()
+    return totals.get('today', 0), totals.get('last_week', 0)
+
+
+def derive_new_devices_hourly(raw):
+    """new_devices by hour across all brands/features (build_new_devices_hourly_query layout)"""
+    columns = ['hour_of_day', 'new_devices_today', 'new_devices_last_week']
+    if raw.empty:
+        return pd.DataFrame(columns=columns)
+
+    wide = _split_periods(raw, ['hour_of_day'])
+    return wide[columns].sort_values('hour_of_day', ignore_index=True)
+
+
+def derive_dashboard_frames(raw):
+    """All dashboard frames from one single-scan result
+
+    Returns (summary_df, hourly_df, (new_devices_today, new_devices_last_week), new_devices_hourly).
+    """
+    return (
+        derive_summary(raw),
+        derive_hourly(raw),
+        derive_new_devices_totals(raw),
+        derive_new_devices_hourly(raw),
+    )
@@ -0,0 +1,214 @@
+"""Background export jobs for large raw extracts
+
+Jobs wait in a queue and run on worker threads outside any Streamlit session. Each job
+borrows a pooled connection, streams its query through a server-side cursor chunk by chunk
+(columnar_fetch.iter_stream) and appends every chunk to a local file with the exporters
+writers, so neither the UI thread nor the job ever holds the whole result. Jobs report
+rows written (and the total, when a count query is given) and can be cancelled between
+chunks; partial files of cancelled or failed jobs are removed.
+"""
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from columnar_fetch import iter_stream
+from exporters import EXPORT_FORMATS, XlsxWorkbookWriter, open_table_writer
+from query_telemetry import MISS
+
+XLSX_MAX_ROWS = 1048575  # data rows per worksheet (Excel's limit minus the header row)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class ExportJob:
+    """One extract: its query, output file and live progress"""
+
+    def __init__(self, title, sql, fmt, path, count_sql=None, label=None):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.title = title
+        self.sql = sql
+        self.count_sql = count_sql
+        self.fmt = fmt
+        self.path = path
+        self.status = QUEUED
+        self.rows = 0
+        self.total_rows = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def progress(self):
+        """Fraction of rows written, or None while the total is unknown"""
+        if self.status == DONE:
+            return 1.0
+        if not self.total_rows:
+            return None
+        return min(self.rows / self.total_rows, 1.0)
+
+    def cancel(self):
+        self._cancel.set()
+
+
+class ExportJobRunner:
+    """Queue of export jobs executed by `workers` background threads
+
+    With `statement_timeout_ms`, extracts run under that timeout instead of the
+    connection's dashboard timeout, which is restored to `default_timeout_ms` afterwards.
+    With a `telemetry` recorder, every finished extract is recorded under its job's label.
+    """
+
+    def __init__(self, pool, output_dir, workers=1, chunk_rows=50000, max_jobs=100,
+                 statement_timeout_ms=None, default_timeout_ms=None, telemetry=None):
+        os.makedirs(output_dir, exist_ok=True)
+        self.pool = pool
+        self.output_dir = output_dir
+        self.chunk_rows = chunk_rows
+        self.max_jobs = max_jobs
+        self.statement_timeout_ms = statement_timeout_ms
+        self.default_timeout_ms = default_timeout_ms
+        self.telemetry = telemetry
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"aura-export-{i}", daemon=True).start()
+
+    def submit(self, title, sql, fmt, count_sql=None, label=None):
+        """Queue an extract of `sql` to a new `fmt` file and return its job"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        filename = f"aura_extract_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}.{EXPORT_FORMATS[fmt][1]}"
+        job = ExportJob(title, sql, fmt, os.path.join(self.output_dir, filename), count_sql, label)
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs (their files stay on disk)
+            finished = [job_id for job_id, j in self._jobs.items() if j.finished]
+            for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+                del self._jobs[job_id]
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Request cancellation; a running job stops after its current chunk"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel()
+        return True
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job.cancel_requested:
+                    job.status = CANCELLED
+                    job.finished_at = time.time()
+                else:
+                    self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        partial_path = job.path + '.part'
+        started = time.perf_counter()
+        timings = {}
+        try:
+            with self.pool.connection() as conn:
+                timings['connect'] = time.perf_counter() - started
+                self._set_timeout(conn, self.statement_timeout_ms)
+                try:
+                    if job.count_sql:
+                        with conn.cursor() as cur:
+                            cur.execute(job.count_sql)
+                            job.total_rows = int(cur.fetchone()[0])
+                    with open(partial_path, 'wb') as sink:
+                        self._write(job, conn, sink, timings)
+                finally:
+                    self._set_timeout(conn, self.default_timeout_ms)
+            if job.cancel_requested:
+                os.unlink(partial_path)
+                job.status = CANCELLED
+            else:
+                os.replace(partial_path, job.path)
+                job.status = DONE
+        except Exception as e:
+            if os.path.exists(partial_path):
+                os.unlink(partial_path)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            if self.telemetry is not None:
+                self.telemetry.record(
+                    job.label, MISS, timings, time.perf_counter() - started,
+                    error=job.error, rows=job.rows,
+                    nbytes=os.path.getsize(job.path) if job.status == DONE else 0,
+                )
+
+    def _set_timeout(self, conn, timeout_ms):
+        if self.statement_timeout_ms is not None and timeout_ms is not None:
+            with conn.cursor() as cur:
+                cur.execute(f"SET statement_timeout = {int(timeout_ms)}")
+
+    def _write(self, job, conn, sink, timings=None):
+        """Stream the job's rows into `sink`, stopping early if it is cancelled"""
+        chunks = iter_stream(job.sql, conn, self.chunk_rows, timings)
+        writer = None
+        sheet_rows = sheet_number = 0
+        try:
+            for chunk in chunks:
+                if job.cancel_requested:
+                    break
+                if job.fmt != 'xlsx':
+                    if writer is None:
+                        writer = open_table_writer(job.fmt, sink, chunk.columns)
+                    writer.write(chunk)
+                    job.rows += len(chunk)
+                    continue
+                # xlsx: roll over to a new worksheet at Excel's row limit
+                while writer is None or len(chunk):
+                    if writer is None or sheet_rows == XLSX_MAX_ROWS:
+                        writer = writer or XlsxWorkbookWriter(sink)
+                        sheet_number += 1
+                        writer.add_sheet('Extract' if sheet_number == 1 else f'Extract {sheet_number}', chunk.columns)
+                        sheet_rows = 0
+                    part = chunk.iloc[:XLSX_MAX_ROWS - sheet_rows]
+                    writer.write(part)
+                    sheet_rows += len(part)
+                    job.rows += len(part)
+                    chunk = chunk.iloc[len(part):]
+        finally:
+            chunks.close()
+        if writer is not None:
+            # Also after a cancellation, so the writer's temporary files are released
+            writer.close()
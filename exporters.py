@@ -0,0 +1,167 @@
+"""Chunked export writers for xlsx, CSV and Parquet
+
+Every writer takes its rows as a sequence of DataFrame chunks and writes them straight to a
+binary sink, so the writer itself holds at most one chunk: openpyxl's write-only workbook
+streams rows to disk, CSV chunks are appended as text and Parquet chunks become row groups.
+Several tables go into one workbook as sheets, or into a zip of one file per table for CSV
+and Parquet.
+"""
+import hashlib
+import io
+import re
+import zipfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    pa = None
+
+from openpyxl import Workbook
+
+DEFAULT_CHUNK_ROWS = 50000
+
+# format -> (label, file extension, MIME type)
+EXPORT_FORMATS = {
+    'xlsx': ('Excel', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('CSV', 'csv', 'text/csv'),
+    'parquet': ('Parquet', 'parquet', 'application/vnd.apache.parquet'),
+}
+ZIP_MIME = 'application/zip'
+
+
+def iter_chunks(df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Consecutive row slices of `df` (views, not copies)"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def content_hash(frames):
+    """Hash of the columns and values of {name: DataFrame}, to key cached exports"""
+    digest = hashlib.sha256()
+    for name, df in frames.items():
+        digest.update(name.encode('utf-8'))
+        digest.update('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _plain(chunk):
+    """Categoricals as plain values, so every chunk has the same column types"""
+    categorical = [c for c in chunk.columns if isinstance(chunk[c].dtype, pd.CategoricalDtype)]
+    return chunk.astype({c: object for c in categorical}) if categorical else chunk
+
+
+class CsvTableWriter:
+    """One CSV table; chunks are appended as they arrive"""
+
+    def __init__(self, sink, columns):
+        self._text = io.TextIOWrapper(sink, encoding='utf-8', newline='')
+        pd.DataFrame(columns=list(columns)).to_csv(self._text, index=False)
+
+    def write(self, chunk):
+        chunk.to_csv(self._text, header=False, index=False)
+
+    def close(self):
+        self._text.flush()
+        self._text.detach()
+
+
+class ParquetTableWriter:
+    """One Parquet table; every chunk becomes a row group"""
+
+    def __init__(self, sink, columns):
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet export")
+        self._sink = sink
+        self._columns = list(columns)
+        self._writer = None
+
+    def write(self, chunk):
+        table = pa.Table.from_pandas(_plain(chunk), preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._sink, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is None:
+            # No rows: still write a valid file with the column names
+            pq.write_table(pa.Table.from_pandas(pd.DataFrame(columns=self._columns), preserve_index=False), self._sink)
+        else:
+            self._writer.close()
+
+
+class XlsxWorkbookWriter:
+    """Write-only openpyxl workbook: rows are streamed out instead of kept as cell objects"""
+
+    def __init__(self, sink):
+        self._sink = sink
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+
+    def add_sheet(self, name, columns):
+        # Excel sheet names: at most 31 characters, none of []:*?/\
+        self._sheet = self._workbook.create_sheet(title=re.sub(r'[\[\]:*?/\\]', '_', name)[:31])
+        self._sheet.append([str(c) for c in columns])
+        return self
+
+    def write(self, chunk):
+        chunk = _plain(chunk).astype(object)
+        for row in chunk.where(chunk.notna(), None).itertuples(index=False, name=None):
+            self._sheet.append(row)
+
+    def close(self):
+        self._workbook.save(self._sink)
+
+
+def open_table_writer(fmt, sink, columns):
+    """Single-table writer for 'csv' or 'parquet' (xlsx uses XlsxWorkbookWriter.add_sheet)"""
+    if fmt == 'csv':
+        return CsvTableWriter(sink, columns)
+    if fmt == 'parquet':
+        return ParquetTableWriter(sink, columns)
+    raise ValueError(f"Unknown table format: {fmt}")
+
+
+def write_frames(frames, sink, fmt, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Write {name: DataFrame} to a binary sink chunk by chunk
+
+    xlsx gets one sheet per frame; CSV/Parquet write a single file for one frame and a zip
+    of one file per frame otherwise. Returns the MIME type of what was written.
+    """
+    if fmt == 'xlsx':
+        writer = XlsxWorkbookWriter(sink)
+        for name, df in frames.items():
+            writer.add_sheet(name, df.columns)
+            for chunk in iter_chunks(df, chunk_rows):
+                writer.write(chunk)
+        writer.close()
+        return EXPORT_FORMATS[fmt][2]
+
+    if len(frames) == 1:
+        df = next(iter(frames.values()))
+        writer = open_table_writer(fmt, sink, df.columns)
+        for chunk in iter_chunks(df, chunk_rows):
+            writer.write(chunk)
+        writer.close()
+        return EXPORT_FORMATS[fmt][2]
+
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, df in frames.items():
+            member = f"{re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_').lower()}.{EXPORT_FORMATS[fmt][1]}"
+            with archive.open(member, 'w') as member_sink:
+                writer = open_table_writer(fmt, member_sink, df.columns)
+                for chunk in iter_chunks(df, chunk_rows):
+                    writer.write(chunk)
+                writer.close()
+    return ZIP_MIME
+
+
+def build_export(frames, fmt, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """(bytes, file extension, MIME type) of `frames` exported as `fmt`"""
+    output = io.BytesIO()
+    mime = write_frames(frames, output, fmt, chunk_rows)
+    extension = 'zip' if mime == ZIP_MIME else EXPORT_FORMATS[fmt][1]
+    return output.getvalue(), extension, mime
@@ -0,0 +1,72 @@
+"""Compact dtype schema applied to every dashboard DataFrame right after it is produced
+
+- dimension columns (source, brand, feature, period) become categoricals whose categories
+  are sorted, so sorting by them still follows the lexical order of the original strings
+- hour_of_day becomes int8 (EXTRACT returns it as a double/numeric in Redshift)
+- integer metrics are downcast to int32 when every value fits (they are summed again
+  downstream, so nothing narrower), Decimal/object numbers become float64
+- float metrics stay float64: revenue totals need more than float32's ~7 digits
+
+Group-bys on categorical columns must pass observed=True, otherwise every unobserved
+category shows up as an empty group.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_COLUMNS = ('source', 'brand', 'feature', 'period')
+HOUR_COLUMNS = ('hour_of_day',)
+
+_INT32 = np.iinfo('int32')
+
+
+def _categorical(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    categories = sorted(series.dropna().unique().tolist())
+    return pd.Series(pd.Categorical(series, categories=categories), index=series.index, name=series.name)
+
+
+def _hour(series):
+    if series.isna().any():
+        return series
+    return series.astype('int8')
+
+
+def _metric(series):
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        if len(series) and (series.min() < _INT32.min or series.max() > _INT32.max):
+            return series.astype('int64')
+        return series.astype('int32')
+    if pd.api.types.is_float_dtype(series):
+        return series.astype('float64')
+    if series.dtype == object:
+        # Decimal sums from drivers without a NUMERIC typecaster; text columns are left alone
+        converted = pd.to_numeric(series, errors='coerce')
+        if converted.notna().sum() == series.notna().sum():
+            return converted.astype('float64')
+    return series
+
+
+def compact_frame(df):
+    """Return `df` cast to the compact schema (attrs are kept)"""
+    if df is None or not len(df.columns):
+        return df
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        if name in CATEGORICAL_COLUMNS:
+            columns[name] = _categorical(series)
+        elif name in HOUR_COLUMNS:
+            columns[name] = _hour(series)
+        else:
+            columns[name] = _metric(series)
+    compact = pd.DataFrame(columns, index=df.index, copy=False)
+    compact.attrs = dict(df.attrs)
+    return compact
+
+
+def concat_compact(frames):
+    """pd.concat that keeps the compact schema (differing categories would fall back to object)"""
+    return compact_frame(pd.concat(frames, ignore_index=True))
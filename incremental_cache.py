@@ -0,0 +1,228 @@
+"""Cache tiers for single-scan results: incremental "today" rows and day-scoped history
+
+Each tier stores slices of scan output together with the source scope and the
+brand × feature pairs they cover. A request that is a subset of what is cached is answered
+by filtering locally; only the missing pairs are sent to the database.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from frame_schema import concat_compact
+
+
+def high_water_marks(raw, pairs):
+    """Hour to refresh each period from ({period: hour}): the lowest of the pairs' latest hours
+
+    Marks are kept per (brand, feature) so a pair whose rows lag behind the others is still
+    re-read from its own latest hour. A period missing for any of `pairs` gets no mark, so
+    it is re-read in full.
+    """
+    if raw.empty:
+        return {}
+    latest = raw.groupby(['period', 'brand', 'feature'], observed=True)['hour_of_day'].max()
+    marks = {}
+    for period in latest.index.unique('period'):
+        by_pair = latest.xs(period, level='period')
+        by_pair = by_pair[by_pair.index.isin(list(pairs))]
+        if len(by_pair) == len(pairs):
+            marks[period] = by_pair.min()
+    return marks
+
+
+def merge_since(raw, new_rows, since_hours):
+    """Replace every row at or after each period's high-water hour with the fresh rows
+
+    The high-water hour itself is re-read because it may still have been filling up
+    when it was first loaded.
+    """
+    if not since_hours:
+        return new_rows
+    keep = pd.Series(True, index=raw.index)
+    for period, hour in since_hours.items():
+        keep &= ~((raw['period'] == period) & (raw['hour_of_day'] >= hour))
+    return concat_compact([raw[keep], new_rows])
+
+
+def pair_mask(raw, pairs):
+    """Boolean mask of rows whose (brand, feature) is in `pairs`"""
+    if raw.empty:
+        return pd.Series(False, index=raw.index)
+    return pd.MultiIndex.from_arrays([raw['brand'], raw['feature']]).isin(list(pairs))
+
+
+def missing_rectangles(pairs):
+    """Split (brand, feature) pairs into disjoint brands × features rectangles
+
+    Brands that miss the same set of features share one rectangle, so a typical
+    "added a few brands" request becomes a single query.
+    """
+    features_by_brand = {}
+    for brand, feature in pairs:
+        features_by_brand.setdefault(brand, set()).add(feature)
+    brands_by_features = {}
+    for brand, features in features_by_brand.items():
+        brands_by_features.setdefault(frozenset(features), set()).add(brand)
+    return [(frozenset(brands), features) for features, brands in brands_by_features.items()]
+
+
+class _Slice:
+    """One fetched brands × features rectangle of a source scope"""
+
+    def __init__(self, scope, brands, features, day, raw):
+        self.scope = scope
+        self.brands = frozenset(brands)
+        self.features = frozenset(features)
+        self.pairs = {(b, f) for b in self.brands for f in self.features}
+        self.day = day
+        self.raw = raw
+        self.refreshed_at = time.monotonic()
+
+
+class ScanCache:
+    """Coverage-aware cache of single-scan results for one period tier
+
+    Slices are scoped by source: a slice fetched for all sources (scope None) carries a
+    `source` column and can serve any single-source request, while a single-source slice
+    only serves its own source. With `incremental=True` (the "today" tier) every slice that
+    serves a request is first extended from its high-water mark (at most once every
+    `refresh_interval` seconds); otherwise (the last-week tier) slices are reused as-is
+    until the day rolls over.
+    """
+
+    def __init__(self, incremental=False, max_slices=256, refresh_interval=60):
+        self.incremental = incremental
+        self.refresh_interval = refresh_interval
+        self.max_slices = max_slices
+        self._slices = OrderedDict()  # id -> _Slice, least recently used first
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'full_hits': 0,
+            'partial_hits': 0,
+            'misses': 0,
+            'incremental_loads': 0,
+            'rows_fetched': 0,
+            'evictions': 0,
+        }
+
+    def _plan(self, source, requested, day):
+        """Pick cached slices for each requested pair and return (used, missing pairs)"""
+        scopes = [None] if source is None else [None, source]
+        used = []
+        remaining = set(requested)
+        stale = [slice_id for slice_id, s in self._slices.items() if s.day != day]
+        for slice_id in stale:
+            del self._slices[slice_id]
+        for scope in scopes:
+            for slice_id, cached in self._slices.items():
+                if cached.scope != scope or not remaining:
+                    continue
+                served = cached.pairs & remaining
+                if served:
+                    used.append((slice_id, cached, served))
+                    remaining -= served
+        return used, remaining
+
+    def _jobs(self, source, used, missing):
+        """(jobs, refreshes): full scans of the missing rectangles, then incremental scans of
+        the pairs of the used slices due for a refresh ((slice id, since_hours) per scan in
+        `refreshes`)"""
+        jobs = [(source, sorted(b), sorted(f), None) for b, f in missing_rectangles(missing)]
+        refreshes = []
+        if self.incremental:
+            now = time.monotonic()
+            for slice_id, cached, _ in used:
+                if now - cached.refreshed_at < self.refresh_interval:
+                    continue
+                since_hours = high_water_marks(cached.raw, cached.pairs)
+                # A slice trimmed of pairs another slice owns only refreshes its own pairs
+                for brands, features in missing_rectangles(cached.pairs):
+                    refreshes.append((slice_id, since_hours))
+                    jobs.append((cached.scope, sorted(brands), sorted(features), since_hours))
+        return jobs, refreshes
+
+    def pending_jobs(self, source, brands, features, day):
+        """The (source, brands, features, since_hours) scans `load` would run for this request
+        now; empty when the cache answers it without a query"""
+        requested = {(b, f) for b in brands for f in features}
+        with self._lock:
+            used, missing = self._plan(source, requested, day)
+            return self._jobs(source, used, missing)[0]
+
+    def load(self, source, brands, features, fetch, day):
+        """Return scan rows for source × brands × features, fetching only what is missing
+
+        `fetch(jobs)` runs a list of (source, brands, features, since_hours) scans and
+        returns one frame per job; since_hours is None for a full scan of the rectangle.
+        """
+        requested = {(b, f) for b in brands for f in features}
+        with self._lock:
+            self.stats['requests'] += 1
+            used, missing = self._plan(source, requested, day)
+            for slice_id, _, _ in used:
+                self._slices.move_to_end(slice_id)
+
+        jobs, refreshes = self._jobs(source, used, missing)
+        frames = fetch(jobs) if jobs else []
+        new_frames = frames[:len(jobs) - len(refreshes)]
+        refresh_frames = frames[len(jobs) - len(refreshes):]
+
+        with self._lock:
+            self.stats['rows_fetched'] += sum(len(frame) for frame in frames)
+            if not used:
+                self.stats['misses'] += 1
+            elif missing:
+                self.stats['partial_hits'] += 1
+            else:
+                self.stats['full_hits'] += 1
+
+            served = []
+            refreshed = {}
+            for (slice_id, since_hours), new_rows in zip(refreshes, refresh_frames):
+                refreshed.setdefault(slice_id, (since_hours, []))[1].append(new_rows)
+            for slice_id, (since_hours, slice_frames) in refreshed.items():
+                cached = self._slices.get(slice_id)
+                if cached is not None:
+                    cached.raw = merge_since(cached.raw, concat_compact(slice_frames), since_hours)
+                    cached.refreshed_at = time.monotonic()
+                    self.stats['incremental_loads'] += 1
+            served += [(cached.scope, cached.raw, pairs) for _, cached, pairs in used]
+
+            for (job_source, job_brands, job_features, _), raw in zip(jobs, new_frames):
+                new_slice = _Slice(job_source, job_brands, job_features, day, raw)
+                # Another session may have fetched the same pairs meanwhile; never store them twice
+                overlap = set()
+                for cached in self._slices.values():
+                    if cached.scope == job_source and cached.day == day:
+                        overlap |= cached.pairs & new_slice.pairs
+                if overlap:
+                    new_slice.pairs -= overlap
+                    new_slice.raw = raw[pair_mask(raw, new_slice.pairs)]
+                if new_slice.pairs:
+                    self._slices[self._next_id] = new_slice
+                    self._next_id += 1
+                served.append((job_source, raw, {(b, f) for b in job_brands for f in job_features} & requested))
+
+            while len(self._slices) > self.max_slices:
+                self._slices.popitem(last=False)
+                self.stats['evictions'] += 1
+
+            parts = []
+            for scope, raw, pairs in served:
+                mask = pair_mask(raw, pairs)
+                if scope is None and source is not None and 'source' in raw:
+                    mask &= raw['source'] == source
+                parts.append(raw[mask])
+
+        if not parts:
+            return pd.DataFrame()
+        return concat_compact(parts)
+
+    def invalidate(self):
+        """Drop every cached slice so the next load is a full one"""
+        with self._lock:
+            self._slices.clear()
@@ -0,0 +1,217 @@
+"""Local stand-in for Redshift: embedded DuckDB loaded with a synthetic apps.supply_aura_rtm
+
+Selected with AURA_DB_BACKEND=duckdb. The dashboard's queries run unchanged: a small
+dialect shim rewrites the Redshift-only functions before DuckDB sees them
+
+- GETDATE()           -> the current UTC time as a TIMESTAMP literal (Redshift's GETDATE is UTC)
+- TRUNC(ts)           -> date_trunc('day', ts)
+- DATEADD(unit, n, ts) -> (ts + to_<unit>s(n))
+
+EXTRACT(HOUR FROM ...) and the rest of the SQL are understood by DuckDB as is, and
+integer division is switched on so BIGINT / BIGINT truncates like Redshift. Connections
+behave like psycopg2 ones as far as the dashboard uses them: cursors as context managers,
+named (server-side) cursors, autocommit/commit/rollback, `SET statement_timeout` (ignored)
+and Arrow results with BIGINT sums as int64 rather than DuckDB's 128-bit HUGEINT.
+
+The synthetic table covers `days` days through the last hour of today (UTC), so rows
+"arrive" as GETDATE() moves forward, like the live table.
+"""
+import re
+import threading
+from datetime import datetime, time
+
+from synthetic_data import DEFAULT_SOURCES, synthetic_facts
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - duckdb is only needed for the local backend
+    duckdb = None
+
+TABLE = 'apps.supply_aura_rtm'
+
+_DATEADD_UNITS = {
+    'minute': 'to_minutes', 'hour': 'to_hours', 'day': 'to_days',
+    'week': 'to_weeks', 'month': 'to_months', 'year': 'to_years',
+}
+_FUNCTION = re.compile(r'\b(DATEADD|TRUNC)\s*\(', re.IGNORECASE)
+_IGNORED = re.compile(r'^\s*SET\s+statement_timeout\b', re.IGNORECASE)
+
+
+def _split_call(sql, open_paren):
+    """(arguments, index after the closing parenthesis) of the call opening at `open_paren`"""
+    depth, args, start = 0, [], open_paren + 1
+    for i in range(open_paren, len(sql)):
+        ch = sql[i]
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+            if depth == 0:
+                args.append(sql[start:i].strip())
+                return args, i + 1
+        elif ch == ',' and depth == 1:
+            args.append(sql[start:i].strip())
+            start = i + 1
+    raise ValueError("Unbalanced parentheses in SQL")
+
+
+def translate(sql, now=None):
+    """Rewrite Redshift date functions into DuckDB SQL (innermost calls are handled too)"""
+    now = now or datetime.utcnow()
+    sql = re.sub(r'\bGETDATE\(\)', f"TIMESTAMP '{now:%Y-%m-%d %H:%M:%S}'", sql, flags=re.IGNORECASE)
+    while True:
+        match = _FUNCTION.search(sql)
+        if match is None:
+            return sql
+        args, end = _split_call(sql, match.end() - 1)
+        if match.group(1).upper() == 'TRUNC':
+            replacement = f"date_trunc('day', {args[0]})"
+        else:
+            unit = args[0].strip("'\"").lower()
+            if unit not in _DATEADD_UNITS:
+                raise ValueError(f"Unsupported DATEADD unit: {unit}")
+            replacement = f"({args[2]} + {_DATEADD_UNITS[unit]}(CAST({args[1]} AS BIGINT)))"
+        sql = sql[:match.start()] + replacement + sql[end:]
+
+
+class LocalCursor:
+    """DB-API cursor over a DuckDB connection with the psycopg2 features the dashboard uses"""
+
+    def __init__(self, connection, name=None):
+        self._connection = connection
+        self.name = name  # DuckDB results are already streamed; named cursors need nothing extra
+        self.description = None
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, sql, params=None):
+        if _IGNORED.match(sql):
+            self.description = None
+            return self
+        self._connection._begin_if_needed()
+        self._connection._duck.execute(translate(sql), params)
+        self.description = self._connection._duck.description
+        return self
+
+    def fetchone(self):
+        return self._connection._duck.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._connection._duck.fetchmany(size)
+
+    def fetchall(self):
+        return self._connection._duck.fetchall()
+
+    def fetch_arrow_table(self):
+        import pyarrow as pa
+        table = self._connection._duck.fetch_arrow_table()
+        # SUM(BIGINT) is HUGEINT in DuckDB (decimal128(38, 0) in Arrow); Redshift returns BIGINT
+        schema = pa.schema([
+            field.with_type(pa.int64())
+            if pa.types.is_decimal(field.type) and field.type.scale == 0 else field
+            for field in table.schema
+        ])
+        return table.cast(schema)
+
+    def close(self):
+        self.description = None
+
+
+class LocalConnection:
+    """One DuckDB connection to the shared local database, shaped like a psycopg2 connection"""
+
+    def __init__(self, duck):
+        self._duck = duck
+        self._in_transaction = False
+        self.autocommit = True
+        self.closed = 0
+
+    def cursor(self, name=None):
+        return LocalCursor(self, name)
+
+    def _begin_if_needed(self):
+        # psycopg2 opens a transaction implicitly on the first statement when autocommit is off
+        if not self.autocommit and not self._in_transaction:
+            self._duck.execute("BEGIN TRANSACTION")
+            self._in_transaction = True
+
+    def commit(self):
+        if self._in_transaction:
+            self._duck.execute("COMMIT")
+            self._in_transaction = False
+
+    def rollback(self):
+        if self._in_transaction:
+            self._duck.execute("ROLLBACK")
+            self._in_transaction = False
+
+    def close(self):
+        if not self.closed:
+            self._duck.close()
+            self.closed = 1
+
+
+class LocalDatabase:
+    """In-process DuckDB database holding a synthetic apps.supply_aura_rtm
+
+    With `path`, the database is a file that is reused if it already has the table (delete
+    it to regenerate); otherwise it lives in memory for the life of the process.
+    """
+
+    def __init__(self, brands, features, sources=DEFAULT_SOURCES, days=8, rows_per_hour=1, seed=0, path=None):
+        if duckdb is None:
+            raise ImportError("duckdb is required for AURA_DB_BACKEND=duckdb (pip install duckdb)")
+        self._root = duckdb.connect(path or ':memory:')
+        exists = self._root.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = 'apps' AND table_name = 'supply_aura_rtm'"
+        ).fetchone()[0]
+        if not exists:
+            self._load(brands, features, sources, days, rows_per_hour, seed)
+        self.rows = self._root.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+
+    def _load(self, brands, features, sources, days, rows_per_hour, seed):
+        today_end = datetime.combine(datetime.utcnow().date(), time(23))
+        facts = synthetic_facts(brands, features, sources, days=days, end=today_end,
+                                seed=seed, rows_per_hour=rows_per_hour)
+        self._root.execute("CREATE SCHEMA IF NOT EXISTS apps")
+        self._root.register('synthetic_facts', facts)
+        self._root.execute(f"""
+CREATE TABLE {TABLE} AS
+SELECT
+    CAST(date_hour AS TIMESTAMP) AS date_hour,
+    CAST(source AS VARCHAR) AS source,
+    CAST(brand AS VARCHAR) AS brand,
+    CAST(feature AS VARCHAR) AS feature,
+    CAST(revenue AS DECIMAL(18, 4)) AS revenue,
+    CAST(notification_shown AS BIGINT) AS notification_shown,
+    CAST(experience_shown AS BIGINT) AS experience_shown,
+    CAST(install_success AS BIGINT) AS install_success,
+    CAST(new_devices AS BIGINT) AS new_devices
+FROM synthetic_facts
+ORDER BY date_hour
+""")
+        self._root.unregister('synthetic_facts')
+
+    def connect(self):
+        """A new connection to the database (each pooled connection can run concurrently)"""
+        duck = self._root.cursor()
+        duck.execute("SET integer_division = true")
+        return LocalConnection(duck)
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def local_database(brands, features, **kwargs):
+    """Process-wide LocalDatabase for these arguments, created on first use"""
+    key = (tuple(brands), tuple(features), tuple(sorted(kwargs.items())))
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = LocalDatabase(brands, features, **kwargs)
+        return _databases[key]
@@ -0,0 +1,315 @@
+"""Prometheus-style metrics for the dashboard process, served over a local HTTP port
+
+A small in-process registry (no client library or external service): counters, gauges
+and histograms updated as things happen, plus collectors that read the existing stats()
+snapshots of the connection pool, scan caches and result store at scrape time.
+`start_http_server` serves everything in the Prometheus text format (version 0.0.4) at
+/metrics from a daemon thread:
+
+    curl -s localhost:9464/metrics
+
+DashboardMetrics defines the dashboard's metrics (all prefixed `aura_`) and the hooks
+the dashboard calls: query telemetry records, get_data cache outcomes, sample-data
+fallbacks, session stores and the shared caches.
+"""
+import math
+import threading
+import weakref
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Query latency buckets (seconds): cache hits take milliseconds, full scans up to the 120 s timeout
+QUERY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class _Metric:
+    """Base of the event-driven metric types: values per label combination"""
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return dict(zip(self.labelnames, key))
+
+    def samples(self):
+        """[(sample name, labels, value)] of the current values"""
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=QUERY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                labels = self._labels(key)
+                for bound, count in zip(self.buckets, counts):
+                    samples.append((f"{self.name}_bucket", {**labels, 'le': _format_value(float(bound))}, count))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, counts[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """Metrics of one process, rendered together in the Prometheus text format
+
+    Collectors are callables returning [(name, kind, help, [(labels, value)])] families,
+    evaluated at every scrape; a family they share with an event-driven metric (same
+    name) is merged into it.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=QUERY_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def register_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        """Every metric as Prometheus text exposition"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        families = {}
+        for metric in metrics:
+            families[metric.name] = [metric.kind, metric.help, metric.samples()]
+        for collector in collectors:
+            for name, kind, help, values in collector():
+                family = families.setdefault(name, [kind, help, []])
+                family[2].extend((name, labels, value) for labels, value in values)
+
+        lines = []
+        for name, (kind, help, samples) in families.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the dashboard's console
+        pass
+
+
+def start_http_server(registry, port, host='127.0.0.1'):
+    """Serve `registry` at http://host:port/metrics from a daemon thread (port 0 picks a free one)"""
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='aura-metrics', daemon=True)
+    thread.start()
+    return server
+
+
+class DashboardMetrics:
+    """The dashboard's metrics and the hooks that feed them"""
+
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        self.server = None
+        self.query_seconds = self.registry.histogram(
+            'aura_query_duration_seconds', "Dashboard query latency by query builder and how it was served",
+            ('builder', 'cache'),
+        )
+        self.query_errors = self.registry.counter(
+            'aura_query_errors_total', "Dashboard queries that failed, by query builder", ('builder',),
+        )
+        self.cache_hits = self.registry.counter('aura_cache_hits_total', "Cache lookups answered from the cache", ('cache',))
+        self.cache_misses = self.registry.counter('aura_cache_misses_total', "Cache lookups that had to compute or query", ('cache',))
+        self.cache_evictions = self.registry.counter('aura_cache_evictions_total', "Entries evicted from a cache", ('cache',))
+        self.sample_fallbacks = self.registry.counter(
+            'aura_sample_data_fallbacks_total', "Loads that fell back to sample data instead of query results", ('reason',),
+        )
+        self._sessions = weakref.WeakSet()
+        self._caches = {}  # name -> (stats(), {family suffix: stats keys summed})
+        self._pool = None
+        self._local = threading.local()
+        self.registry.register_collector(self._collect)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Start the /metrics endpoint (once); returns the server"""
+        if self.server is None:
+            self.server = start_http_server(self.registry, port, host)
+        return self.server
+
+    # ------------------------------------------------------------------
+    # Hooks
+    # ------------------------------------------------------------------
+    def observe_query(self, entry):
+        """QueryTelemetry listener: one recorded query"""
+        builder = entry.get('builder', 'unknown')
+        if entry.get('error') is not None:
+            self.query_errors.inc(builder=builder)
+        elif entry.get('total_ms') is not None:
+            self.query_seconds.observe(entry['total_ms'] / 1000, builder=builder, cache=entry.get('cache'))
+
+    @contextmanager
+    def cached_call(self, cache):
+        """Count the call in the block as a hit of `cache` unless `computed` is called inside it"""
+        self._local.computed = False
+        yield
+        (self.cache_misses if self._local.computed else self.cache_hits).inc(cache=cache)
+
+    def computed(self):
+        """Mark the current cached_call as a miss (call from the cached function's body)"""
+        self._local.computed = True
+
+    def sample_fallback(self, reason):
+        self.sample_fallbacks.inc(reason=reason)
+
+    def track_session(self, store):
+        """Count a session's SessionFrameStore until the session's state is dropped"""
+        self._sessions.add(store)
+
+    def session_evicted(self, n=1):
+        self.cache_evictions.inc(n, cache='session')
+
+    def watch_cache(self, name, stats, hits=('hits',), misses=('misses',), evictions=('evictions',)):
+        """Report a cache's cumulative stats() counters at every scrape"""
+        self._caches[name] = (stats, {'hits': hits, 'misses': misses, 'evictions': evictions})
+
+    def watch_pool(self, pool):
+        self._pool = pool
+
+    # ------------------------------------------------------------------
+    # Scrape-time collection
+    # ------------------------------------------------------------------
+    def _collect(self):
+        families = []
+        cache_values = {'hits': [], 'misses': [], 'evictions': []}
+        for name, (stats, keys) in list(self._caches.items()):
+            snapshot = stats() if callable(stats) else stats
+            for suffix, stat_keys in keys.items():
+                cache_values[suffix].append(({'cache': name}, sum(snapshot.get(k, 0) for k in stat_keys)))
+        families += [
+            ('aura_cache_hits_total', 'counter', self.cache_hits.help, cache_values['hits']),
+            ('aura_cache_misses_total', 'counter', self.cache_misses.help, cache_values['misses']),
+            ('aura_cache_evictions_total', 'counter', self.cache_evictions.help, cache_values['evictions']),
+        ]
+
+        sessions = list(self._sessions)
+        families += [
+            ('aura_active_sessions', 'gauge', "Browser sessions whose state the server still holds", [({}, len(sessions))]),
+            ('aura_session_state_bytes', 'gauge', "Bytes of loaded data held in st.session_state across sessions",
+             [({}, sum(store.nbytes for store in sessions))]),
+        ]
+
+        if self._pool is not None:
+            stats = self._pool.stats()
+            families += [
+                ('aura_pool_connections', 'gauge', "Open pooled connections by state",
+                 [({'state': 'in_use'}, stats['in_use']), ({'state': 'idle'}, stats['idle'])]),
+                ('aura_pool_max_connections', 'gauge', "Pool size limit", [({}, stats['maxconn'])]),
+                ('aura_pool_utilization', 'gauge', "Share of the pool's connections checked out", [({}, stats['utilization'])]),
+                ('aura_pool_checkouts_total', 'counter', "Connections checked out of the pool", [({}, stats['checkouts'])]),
+                ('aura_pool_waits_total', 'counter', "Checkouts that waited for a free connection", [({}, stats['waits'])]),
+                ('aura_pool_timeouts_total', 'counter', "Checkouts that gave up waiting", [({}, stats['timeouts'])]),
+                ('aura_pool_wait_seconds_total', 'counter', "Time spent waiting for connections", [({}, stats['total_wait_seconds'])]),
+                ('aura_pool_connect_failures_total', 'counter', "Failed attempts to open a connection", [({}, stats['connect_failures'])]),
+            ]
+        return families
@@ -0,0 +1,144 @@
+"""Dense in-memory cube of hourly sums for instant filter changes
+
+The cube holds one load's single-scan rows as a NumPy array indexed by
+source × brand × feature × hour × period × metric. Any source/brand/feature selection
+inside what was loaded is answered by slicing and reducing that array, producing the
+same frames as dashboard_frames.derive_dashboard_frames without touching the database.
+"""
+import numpy as np
+import pandas as pd
+
+from dashboard_frames import HOURLY_METRICS, PERIODS, SUMMARY_METRICS, pct_diff
+
+HOURS = 24
+
+
+class HourlyCube:
+    """source × brand × feature × hour × period × metric array of hourly sums"""
+
+    def __init__(self, sources, brands, features, values, present, integer_metrics, scope_source=None):
+        self.sources = list(sources)
+        self.brands = list(brands)
+        self.features = list(features)
+        self.values = values              # float64 (S, B, F, 24, 2, M)
+        self.present = present            # bool (S, B, F, 24, 2): a row existed for the cell
+        # Shared by every rerun that slices it; nothing may write into it
+        self.values.flags.writeable = False
+        self.present.flags.writeable = False
+        self.integer_metrics = set(integer_metrics)
+        self.scope_source = scope_source  # None if every source was loaded
+        self._source_index = {s: i for i, s in enumerate(self.sources)}
+        self._brand_index = {b: i for i, b in enumerate(self.brands)}
+        self._feature_index = {f: i for i, f in enumerate(self.features)}
+
+    @classmethod
+    def from_raw(cls, raw, brands, features, source=None):
+        """Build a cube from single-scan rows loaded for source × brands × features"""
+        brands = sorted(brands)
+        features = sorted(features)
+        # NULL sources become '' (astype first: a categorical cannot take a new value)
+        source_column = raw['source'].astype(object).fillna('') if not raw.empty else None
+        sources = sorted(source_column.unique().tolist()) if not raw.empty else []
+        shape = (len(sources), len(brands), len(features), HOURS, len(PERIODS))
+        size = int(np.prod(shape))
+
+        values = np.zeros(shape + (len(HOURLY_METRICS),), dtype='float64')
+        present = np.zeros(shape, dtype=bool)
+        integer_metrics = []
+        if raw.empty:
+            return cls(sources, brands, features, values, present, integer_metrics, source)
+
+        codes = [
+            pd.Categorical(source_column, categories=sources).codes,
+            pd.Categorical(raw['brand'], categories=brands).codes,
+            pd.Categorical(raw['feature'], categories=features).codes,
+            raw['hour_of_day'].to_numpy().astype('int64'),
+            pd.Categorical(raw['period'], categories=PERIODS).codes,
+        ]
+        valid = np.logical_and.reduce([c >= 0 for c in codes])
+        flat = np.ravel_multi_index([c[valid] for c in codes], shape)
+
+        present = (np.bincount(flat, minlength=size) > 0).reshape(shape)
+        for m, metric in enumerate(HOURLY_METRICS):
+            column = raw[metric]
+            if pd.api.types.is_integer_dtype(column):
+                integer_metrics.append(metric)
+            weights = pd.to_numeric(column, errors='coerce').to_numpy(dtype='float64')[valid]
+            values[..., m] = np.bincount(flat, weights=weights, minlength=size).reshape(shape)
+        return cls(sources, brands, features, values, present, integer_metrics, source)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.present.nbytes
+
+    def covers(self, source=None, brands=None, features=None):
+        """True if the selection can be answered from this cube alone"""
+        if self.scope_source is not None and source != self.scope_source:
+            return False
+        brands = brands if brands else []
+        features = features if features else []
+        return set(brands) <= set(self.brands) and set(features) <= set(self.features)
+
+    def _slice(self, source, brands, features):
+        """(values, present) reduced over the selected sources, for sorted brands/features"""
+        if source is None:
+            source_idx = list(range(len(self.sources)))
+        else:
+            source_idx = [self._source_index[source]] if source in self._source_index else []
+        brand_idx = [self._brand_index[b] for b in brands]
+        feature_idx = [self._feature_index[f] for f in features]
+
+        selector = np.ix_(source_idx, brand_idx, feature_idx)
+        values = self.values[selector].sum(axis=0)      # (B, F, 24, 2, M)
+        present = self.present[selector].any(axis=0)    # (B, F, 24, 2)
+        return values, present
+
+    def _cast(self, metric, array):
+        return array.astype('int64') if metric in self.integer_metrics else array
+
+    def frames(self, source=None, brands=None, features=None):
+        """(summary_df, hourly_df, (new_devices_today, new_devices_last_week), new_devices_hourly)"""
+        brands = sorted(brands if brands else self.brands)
+        features = sorted(features if features else self.features)
+        values, present = self._slice(source, brands, features)
+        m_index = {metric: m for m, metric in enumerate(HOURLY_METRICS)}
+
+        # Summary: brand × feature pairs that had any row in either period
+        pair_present = present.any(axis=(2, 3))
+        b_idx, f_idx = np.nonzero(pair_present)
+        totals = values.sum(axis=2)[b_idx, f_idx]       # (rows, 2, M)
+        summary = {'brand': np.array(brands, dtype=object)[b_idx], 'feature': np.array(features, dtype=object)[f_idx]}
+        for metric in SUMMARY_METRICS:
+            today = self._cast(metric, totals[:, 0, m_index[metric]])
+            last_week = self._cast(metric, totals[:, 1, m_index[metric]])
+            summary[f'{metric}_today'] = today
+            summary[f'{metric}_last_week'] = last_week
+            summary[f'{metric}_diff'] = today - last_week
+            summary[f'{metric}_pct_diff'] = pct_diff(today, last_week)
+        summary_df = pd.DataFrame(summary)
+
+        # Hourly: brand × feature × hour cells present in either period, ordered by hour
+        cell_present = present.any(axis=3).transpose(2, 0, 1)        # (24, B, F)
+        h_idx, b_idx, f_idx = np.nonzero(cell_present)
+        cells = values[b_idx, f_idx, h_idx]                           # (rows, 2, M)
+        hourly = {
+            'brand': np.array(brands, dtype=object)[b_idx],
+            'feature': np.array(features, dtype=object)[f_idx],
+            'hour_of_day': h_idx,
+        }
+        for metric in HOURLY_METRICS:
+            hourly[f'{metric}_today'] = self._cast(metric, cells[:, 0, m_index[metric]])
+            hourly[f'{metric}_last_week'] = self._cast(metric, cells[:, 1, m_index[metric]])
+        hourly_df = pd.DataFrame(hourly)
+
+        # new_devices: totals and by hour across every selected brand/feature
+        nd = values[..., m_index['new_devices']].sum(axis=(0, 1))    # (24, 2)
+        nd = self._cast('new_devices', nd)
+        totals = nd.sum(axis=0)
+        hours = np.nonzero(present.any(axis=(0, 1, 3)))[0]
+        new_devices_hourly = pd.DataFrame({
+            'hour_of_day': hours,
+            'new_devices_today': nd[hours, 0],
+            'new_devices_last_week': nd[hours, 1],
+        })
+        return summary_df, hourly_df, (totals[0], totals[1]), new_devices_hourly
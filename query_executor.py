@@ -0,0 +1,119 @@
+"""Run independent dashboard queries in parallel on separate pooled connections"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from columnar_fetch import fetch_columnar
+from query_telemetry import COALESCED, MISS, RESULT_STORE
+from result_store import result_key
+
+
+class QueryBundle:
+    """Results of one batch of named queries: frames, per-query errors and timings"""
+
+    def __init__(self):
+        self.frames = {}
+        self.errors = {}
+        self.timings = {}
+
+    def __getitem__(self, name):
+        return self.frames[name]
+
+    def __contains__(self, name):
+        return name in self.frames
+
+    def get(self, name, default=None):
+        return self.frames.get(name, default)
+
+    def ok(self, name):
+        """True if the named query finished without an error"""
+        return name in self.frames and name not in self.errors
+
+    @property
+    def wall_time(self):
+        """Elapsed time of the slowest query in the batch"""
+        return max(self.timings.values(), default=0.0)
+
+
+def _fetch_one(pool, sql, fetch, single_flight, result_store, ttl, timings):
+    """(result, cache outcome) of one query; `timings` (or None) collects phase durations"""
+    if result_store is not None:
+        key = result_key(sql)
+        cached = result_store.get(key)
+        if cached is not None:
+            return cached, RESULT_STORE
+
+    executed = []
+
+    def execute():
+        executed.append(True)
+        started = time.perf_counter()
+        with pool.connection() as conn:
+            if timings is None:
+                result = fetch(sql, conn)
+            else:
+                timings['connect'] = time.perf_counter() - started
+                result = fetch(sql, conn, timings=timings)
+        if result_store is not None:
+            result_store.put(key, result, ttl)
+        return result
+
+    # Identical SQL already running elsewhere is awaited instead of re-executed
+    result = single_flight.do(sql, execute) if single_flight is not None else execute()
+    return result, MISS if executed else COALESCED
+
+
+def _run_one(pool, sql, fetch, single_flight, result_store, ttl, telemetry=None, label=None):
+    started = time.perf_counter()
+    timings = {} if telemetry is not None else None
+    try:
+        result, cache = _fetch_one(pool, sql, fetch, single_flight, result_store, ttl, timings)
+    except Exception as e:
+        if telemetry is not None:
+            telemetry.record(label, MISS, timings, time.perf_counter() - started, error=e)
+        raise
+    elapsed = time.perf_counter() - started
+    if telemetry is not None:
+        telemetry.record(label, cache, timings, elapsed, result)
+    return result, elapsed
+
+
+def run_queries_concurrently(queries, pool, fetch=None, max_workers=None, single_flight=None,
+                             result_store=None, ttl=300, on_wait=None, poll_interval=0.25,
+                             telemetry=None, labels=None):
+    """Execute `queries` ({name: sql}) concurrently, each on its own pooled connection
+
+    Page load time is bounded by the slowest query instead of the sum of all of them.
+    A failing query does not cancel the others; its exception is kept in `bundle.errors`.
+    With a `single_flight` group, a query identical to one already in flight (from any
+    session) waits for that execution and shares its result. With a `result_store`,
+    results are looked up in (and written to) that shared cache for `ttl` seconds.
+    `on_wait` is called on the calling thread every `poll_interval` seconds until all
+    queries finish (e.g. to update a progress indicator, which worker threads cannot do).
+    With a `telemetry` recorder (query_telemetry.QueryTelemetry), every query is recorded
+    under its entry in `labels` ({name: query_label(...)}); `fetch` must then accept a
+    `timings` keyword.
+    """
+    fetch = fetch or fetch_columnar
+    bundle = QueryBundle()
+    if not queries:
+        return bundle
+
+    workers = max_workers or min(len(queries), getattr(pool, 'maxconn', len(queries)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aura-query") as executor:
+        futures = {
+            name: executor.submit(
+                _run_one, pool, sql, fetch, single_flight, result_store, ttl,
+                telemetry, (labels or {}).get(name),
+            )
+            for name, sql in queries.items()
+        }
+        pending = set(futures.values())
+        while on_wait is not None and pending:
+            _, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            on_wait()
+        for name, future in futures.items():
+            try:
+                bundle.frames[name], bundle.timings[name] = future.result()
+            except Exception as e:
+                bundle.errors[name] = e
+    return bundle
@@ -0,0 +1,130 @@
+"""EXPLAIN preflight: estimate what a load will scan before any of its queries run
+
+Every query of a load is EXPLAINed on a pooled connection (planning only, nothing is
+scanned). The estimate is taken from the plan text of either backend:
+
+- Redshift (and PostgreSQL): `(cost=<startup>..<total> rows=<n> width=<w>)` on every plan
+  node; the root node's total cost is the query's cost
+- DuckDB (local backend): `~<n> rows` in every operator box; no cost is given
+
+and the estimated rows of a query are the largest node estimate in its plan, i.e. its
+biggest scan. ScanCostGuard compares a load's estimates with the configured limits and
+offers an over-limit load to its `route` hook, which can send it to a cheaper source.
+"""
+import re
+import time
+
+from query_telemetry import EXPLAIN
+
+WARN = 'warn'
+CONFIRM = 'confirm'
+
+_REDSHIFT_NODE = re.compile(r'\(cost=[\d.]+\.\.(?P<cost>[\d.]+)\s+rows=(?P<rows>\d+)')
+_DUCKDB_ROWS = re.compile(r'~\s*(?P<rows>[\d,]+)\s+rows\b', re.IGNORECASE)
+
+
+def parse_mode(value):
+    """Preflight mode for an AURA_PREFLIGHT value: 'warn', 'confirm' or None (off)"""
+    value = (value or '').strip().lower()
+    return value if value in (WARN, CONFIRM) else None
+
+
+class PlanEstimate:
+    """Estimated cost (None when the backend gives none) and rows of one query plan"""
+
+    def __init__(self, plan, cost=None, rows=None, seconds=None):
+        self.plan = plan
+        self.cost = cost
+        self.rows = rows
+        self.seconds = seconds  # how long EXPLAIN took
+
+
+def parse_plan(plan):
+    """PlanEstimate for the text of an EXPLAIN result"""
+    nodes = list(_REDSHIFT_NODE.finditer(plan))
+    if nodes:
+        return PlanEstimate(plan, cost=float(nodes[0].group('cost')), rows=max(int(m.group('rows')) for m in nodes))
+    rows = [int(m.group('rows').replace(',', '')) for m in _DUCKDB_ROWS.finditer(plan)]
+    return PlanEstimate(plan, rows=max(rows) if rows else None)
+
+
+def explain(conn, sql):
+    """Plan text of `sql` (one line per result row; the plan is the last column)"""
+    with conn.cursor() as cur:
+        cur.execute(f"EXPLAIN {sql}")
+        return '\n'.join(str(row[-1]) for row in cur.fetchall())
+
+
+def explain_queries(pool, queries, telemetry=None, labels=None):
+    """{name: PlanEstimate} of every query, EXPLAINed in turn on one pooled connection
+
+    Each plan is recorded in `telemetry` (cache outcome 'explain') with its cost and rows,
+    under the same label as the query itself.
+    """
+    estimates = {}
+    started = time.perf_counter()
+    with pool.connection() as conn:
+        connect = time.perf_counter() - started
+        for name, sql in queries.items():
+            query_started = time.perf_counter()
+            estimate = parse_plan(explain(conn, sql))
+            estimate.seconds = time.perf_counter() - query_started
+            estimates[name] = estimate
+            if telemetry is not None:
+                label = {**((labels or {}).get(name) or {'builder': str(name)}), 'plan_cost': estimate.cost, 'plan_rows': estimate.rows}
+                telemetry.record(label, EXPLAIN, {'connect': connect, 'execute': estimate.seconds}, connect + estimate.seconds,
+                                 rows=0, nbytes=0, plan=estimate.plan)
+                connect = 0.0
+    return estimates
+
+
+class PreflightVerdict:
+    """A load's combined estimate checked against the guard's limits"""
+
+    def __init__(self, estimates, cost, rows, reasons, route=None):
+        self.estimates = estimates
+        self.cost = cost
+        self.rows = rows
+        self.reasons = reasons  # why the load is over the limits (empty when it is not)
+        self.route = route      # where the route hook sent an over-limit load, if anywhere
+
+    @property
+    def over_limit(self):
+        return bool(self.reasons)
+
+    def summary(self):
+        parts = []
+        if self.rows is not None:
+            parts.append(f"~{self.rows:,} rows scanned")
+        if self.cost is not None:
+            parts.append(f"plan cost {self.cost:,.0f}")
+        return ' · '.join(parts) or "no estimate in the plan"
+
+
+class ScanCostGuard:
+    """Limits on a load's estimated cost and rows scanned (None: no limit)
+
+    `route(verdict, selection)` is called for loads over a limit and returns a description
+    of the cheaper source it routed them to, or None to leave them as they are.
+    """
+
+    def __init__(self, max_cost=None, max_rows=None, route=None):
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.route = route
+
+    def check(self, estimates, selection=None):
+        """PreflightVerdict of a load whose queries have these {name: PlanEstimate}"""
+        costs = [e.cost for e in estimates.values() if e.cost is not None]
+        rows = [e.rows for e in estimates.values() if e.rows is not None]
+        cost = sum(costs) if costs else None
+        total_rows = sum(rows) if rows else None
+        reasons = []
+        if self.max_cost is not None and cost is not None and cost > self.max_cost:
+            reasons.append(f"plan cost {cost:,.0f} > {self.max_cost:,.0f}")
+        if self.max_rows is not None and total_rows is not None and total_rows > self.max_rows:
+            reasons.append(f"~{total_rows:,} rows scanned > {self.max_rows:,}")
+        verdict = PreflightVerdict(estimates, cost, total_rows, reasons)
+        if verdict.over_limit and self.route is not None:
+            verdict.route = self.route(verdict, selection)
+        return verdict
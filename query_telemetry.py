@@ -0,0 +1,123 @@
+"""Per-query telemetry: timings, sizes and cache outcome of every dashboard query
+
+Each query is recorded with the build_*_query function that produced it, a fingerprint
+of its filters (source, brands, features), the time spent borrowing a connection,
+executing and fetching, the rows and bytes returned and how it was served. Records are
+kept in memory for the sidebar Performance panel and appended as JSON lines to a
+size-rotated log file, so slow filter combinations can also be found offline.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+
+from session_store import value_nbytes
+
+# How a query was served
+MISS = 'miss'                  # executed on the database
+RESULT_STORE = 'result_store'  # read from the shared result store
+COALESCED = 'coalesced'        # waited for an identical query already in flight
+SCAN_CACHE = 'scan_cache'      # answered by the in-process scan cache; nothing was sent
+EXPLAIN = 'explain'            # EXPLAIN preflight of a query (its plan, not its rows)
+
+
+def filter_fingerprint(source=None, brands=None, features=None):
+    """Short stable id of a filter combination (brand/feature order does not matter)"""
+    payload = json.dumps([source, sorted(brands or []), sorted(features or [])])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:10]
+
+
+def query_label(builder, source=None, brands=None, features=None, **extra):
+    """Fields that identify a query in telemetry: its builder and filter combination"""
+    return {
+        'builder': builder,
+        'fingerprint': filter_fingerprint(source, brands, features),
+        'source': source or 'All',
+        'brands': len(brands or []),
+        'features': len(features or []),
+        **extra,
+    }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class QueryTelemetry:
+    """Thread-safe recorder of query telemetry (recent records in memory, all in the log)
+
+    `on_record`, if given, is called with every record (e.g. to feed metrics).
+    """
+
+    def __init__(self, log_path=None, max_bytes=10 * 1024 ** 2, backups=5, keep=500, on_record=None):
+        self.log_path = log_path
+        self.on_record = on_record
+        self._records = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._log = None
+        if log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+            # A private logger: nothing reaches (or comes from) the application's loggers
+            self._log = logging.Logger('aura.query_telemetry')
+            handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._log.addHandler(handler)
+
+    def record(self, label, cache, timings, total, result=None, error=None, rows=None, nbytes=None, plan=None):
+        """Record one query; `timings` holds seconds for 'connect', 'execute' and 'fetch'
+
+        rows/nbytes default to the size of `result` (given for results that are not kept,
+        e.g. extracts streamed to a file). `plan` is the text of an EXPLAIN preflight.
+        """
+        entry = {
+            'ts': round(time.time(), 3),
+            **(label or {'builder': 'unknown'}),
+            'cache': cache,
+            'connect_ms': _ms(timings.get('connect')),
+            'execute_ms': _ms(timings.get('execute')),
+            'fetch_ms': _ms(timings.get('fetch')),
+            'total_ms': _ms(total),
+            'rows': rows if rows is not None else (len(result) if result is not None else 0),
+            'bytes': nbytes if nbytes is not None else value_nbytes(result),
+            'error': error if error is None or isinstance(error, str) else f"{type(error).__name__}: {error}",
+        }
+        if plan is not None:
+            entry['plan'] = plan
+        with self._lock:
+            self._records.append(entry)
+        if self._log is not None:
+            self._log.info(json.dumps(entry, default=str))
+        if self.on_record is not None:
+            self.on_record(entry)
+        return entry
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def frame(self):
+        """Recent records as a DataFrame, oldest first"""
+        return pd.DataFrame(self.records())
+
+    def slowest(self, n=10):
+        """Filter combinations of executed queries, slowest median first"""
+        df = self.frame()
+        if df.empty or 'cache' not in df:
+            return pd.DataFrame()
+        executed = df[(df['cache'] == MISS) & df['error'].isna()]
+        if executed.empty:
+            return pd.DataFrame()
+        grouped = executed.groupby(['builder', 'fingerprint', 'source', 'brands', 'features'])
+        summary = grouped.agg(
+            runs=('total_ms', 'size'),
+            median_ms=('total_ms', 'median'),
+            max_ms=('total_ms', 'max'),
+            rows=('rows', 'median'),
+        ).reset_index()
+        return summary.sort_values('median_ms', ascending=False, ignore_index=True).head(n)
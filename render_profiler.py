@@ -0,0 +1,207 @@
+"""Render-path profiler for Streamlit reruns
+
+When profiling is on, every rerun gets a RenderProfiler on the script thread. Code on the
+render path marks its stages with `stage(name)` or the `profiled` decorator (both are
+no-ops when profiling is off, and in worker threads). At the end of the rerun the
+profiler has each stage's start offset and duration, nested as the calls were, which
+the dashboard draws as a waterfall. It also writes two files per rerun:
+
+- <name>.folded: collapsed stacks of the stages ("main;render_dashboard;... <µs>"), the
+  input format of flamegraph.pl, speedscope and inferno
+- <name>.prof: a cProfile dump of the whole rerun (mode 'cprofile' only), for pstats,
+  snakeviz or flameprof
+"""
+import cProfile
+import glob
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import pandas as pd
+import plotly.graph_objects as go
+
+STAGES = 'stages'
+CPROFILE = 'cprofile'
+
+_local = threading.local()
+
+
+def parse_mode(value):
+    """Profiling mode for an AURA_PROFILE / ?profile= value: 'stages', 'cprofile' or None"""
+    value = (value or '').strip().lower()
+    if value == CPROFILE:
+        return CPROFILE
+    if value in ('1', 'true', 'yes', 'on', STAGES):
+        return STAGES
+    return None
+
+
+class RenderProfiler:
+    """Stage timings (and optionally a cProfile) of one rerun"""
+
+    def __init__(self, cprofile=False):
+        self.stages = []
+        self.total_ms = None
+        self.started_at = datetime.now()
+        self._stack = []  # (stage id, name) of the open stages
+        self._started = time.perf_counter()
+        self._profile = cProfile.Profile() if cprofile else None
+        if self._profile is not None:
+            self._profile.enable()
+
+    @property
+    def mode(self):
+        return CPROFILE if self._profile is not None else STAGES
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        stage_id = len(self.stages)
+        parent = self._stack[-1][0] if self._stack else None
+        self._stack.append((stage_id, name))
+        path = tuple(n for _, n in self._stack)
+        # Reserve the slot now so ids follow start order; filled in when the stage ends
+        self.stages.append(None)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            self.stages[stage_id] = {
+                'id': stage_id,
+                'parent': parent,
+                'stage': name,
+                'path': path,
+                'depth': len(path) - 1,
+                'start_ms': (started - self._started) * 1000,
+                'duration_ms': (time.perf_counter() - started) * 1000,
+            }
+
+    def finish(self):
+        if self.total_ms is None:
+            if self._profile is not None:
+                self._profile.disable()
+            self.total_ms = (time.perf_counter() - self._started) * 1000
+        return self
+
+    def frame(self):
+        """Stages in start order with their self time (duration minus nested stages)"""
+        stages = self._finished()
+        if not stages:
+            return pd.DataFrame(columns=['stage', 'depth', 'start_ms', 'duration_ms', 'self_ms'])
+        children = self._child_time(stages)
+        df = pd.DataFrame(stages)
+        df['self_ms'] = df['duration_ms'] - df['id'].map(lambda i: children.get(i, 0.0))
+        return df.drop(columns=['id', 'parent', 'path'])
+
+    def _finished(self):
+        """Completed stages in start order (a stage still open has no duration yet)"""
+        return [stage for stage in self.stages if stage is not None]
+
+    @staticmethod
+    def _child_time(stages):
+        """Total duration of the direct child stages of each stage id"""
+        children = {}
+        for stage in stages:
+            if stage['parent'] is not None:
+                children[stage['parent']] = children.get(stage['parent'], 0.0) + stage['duration_ms']
+        return children
+
+    def folded(self):
+        """Collapsed-stack lines (microseconds of self time per stage path)"""
+        stages = self._finished()
+        children = self._child_time(stages)
+        totals = {}
+        for stage in stages:
+            key = ';'.join(stage['path'])
+            totals[key] = totals.get(key, 0.0) + stage['duration_ms'] - children.get(stage['id'], 0.0)
+        # Time outside every stage, so the flame graph's root matches the whole rerun
+        if self.total_ms is not None:
+            staged = sum(s['duration_ms'] for s in stages if s['depth'] == 0)
+            totals['rerun'] = max(self.total_ms - staged, 0.0)
+        return [f"{key} {max(int(ms * 1000), 0)}" for key, ms in totals.items()]
+
+    def dump(self, directory, keep=50):
+        """Write this rerun's .folded (and .prof) files; keep only the newest `keep` reruns"""
+        self.finish()
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"aura_render_{self.started_at:%Y%m%d_%H%M%S_%f}")
+        paths = [base + '.folded']
+        with open(paths[0], 'w') as f:
+            f.write('\n'.join(self.folded()) + '\n')
+        if self._profile is not None:
+            paths.append(base + '.prof')
+            self._profile.dump_stats(paths[-1])
+        for pattern in ('*.folded', '*.prof'):
+            files = sorted(glob.glob(os.path.join(directory, f"aura_render_{pattern}")))
+            for old in files[:-keep]:
+                os.unlink(old)
+        return paths
+
+    def waterfall(self):
+        """Horizontal bars of every stage at its start offset, nested stages indented"""
+        df = self.frame()
+        labels = [f"{'  ' * depth}{name}" for name, depth in zip(df['stage'], df['depth'])]
+        fig = go.Figure(go.Bar(
+            y=list(range(len(df))),
+            x=df['duration_ms'],
+            base=df['start_ms'],
+            orientation='h',
+            marker=dict(color=df['depth'], colorscale='Blues', reversescale=True, cmin=-1, cmax=max(df['depth'].max(), 1) if len(df) else 1),
+            customdata=df[['stage', 'self_ms']],
+            hovertemplate='<b>%{customdata[0]}</b><br>Start: %{base:,.1f} ms<br>Duration: %{x:,.1f} ms<br>Self: %{customdata[1]:,.1f} ms<extra></extra>',
+        ))
+        fig.update_layout(
+            title=dict(text=f"Rerun waterfall ({self.total_ms or 0:,.0f} ms)", x=0.5, xanchor='center'),
+            xaxis_title='ms since the rerun started',
+            yaxis=dict(tickvals=list(range(len(df))), ticktext=labels, autorange='reversed'),
+            height=max(250, 22 * len(df) + 120),
+            margin=dict(l=10, r=20, t=60, b=40),
+            showlegend=False,
+        )
+        return fig
+
+
+def start(mode):
+    """Begin profiling this thread's rerun in `mode` (None: profiling off)
+
+    A profiler an earlier rerun left active (it ended before stop() ran) is finished first,
+    so its cProfile never stays enabled.
+    """
+    stop()
+    _local.profiler = RenderProfiler(cprofile=mode == CPROFILE) if mode else None
+    return _local.profiler
+
+
+def current():
+    """This thread's active profiler, or None"""
+    return getattr(_local, 'profiler', None)
+
+
+def stop():
+    """Finish and detach this thread's profiler (None if profiling is off)"""
+    profiler = current()
+    _local.profiler = None
+    return profiler.finish() if profiler is not None else None
+
+
+@contextmanager
+def stage(name):
+    """Time a block as a stage of the current rerun (no-op when not profiling)"""
+    profiler = current()
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+
+def profiled(fn):
+    """Decorator: time every call of `fn` as a stage named after it"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with stage(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
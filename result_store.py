@@ -0,0 +1,242 @@
+"""Cross-process result cache backends for query results
+
+Streamlit's st.cache_data lives in each worker's memory, so several dashboard processes
+on one host would each run (and hold) the same query results. These stores keep results
+on local disk where every process can reach them:
+
+- ArrowFileResultStore: one uncompressed Arrow IPC file per result, memory-mapped on read
+- SQLiteResultStore: Arrow IPC blobs inside a single SQLite database file
+
+Both track TTLs and sizes in SQLite (which handles cross-process locking), write
+atomically and evict the least recently used results once `max_bytes` is exceeded.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    pa = None
+
+
+def result_key(text):
+    """Stable, filesystem-safe key for a query (or any string)"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _to_arrow(df):
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _to_pandas(table):
+    # split_blocks avoids consolidating columns, so numeric buffers can be used in place
+    return table.to_pandas(split_blocks=True)
+
+
+class ResultStore:
+    """Interface shared by the result cache backends"""
+
+    def get(self, key):
+        """Return the cached DataFrame for `key`, or None if missing/expired"""
+        raise NotImplementedError
+
+    def put(self, key, df, ttl):
+        """Store `df` under `key` for `ttl` seconds"""
+        raise NotImplementedError
+
+    def contains(self, key):
+        """Whether a live result is stored under `key` (not counted as a hit or miss)"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+class _SQLiteIndexedStore(ResultStore):
+    """TTL/LRU bookkeeping shared by both backends (one row per cached result)"""
+
+    def __init__(self, index_path, max_bytes):
+        if pa is None:
+            raise ImportError("pyarrow is required for the shared result store")
+        self.index_path = index_path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'writes': 0}
+        self._counters_lock = threading.Lock()
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, size INTEGER NOT NULL, expires_at REAL NOT NULL,"
+                " last_access REAL NOT NULL, payload BLOB)"
+            )
+
+    def _db(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, n=1):
+        with self._counters_lock:
+            self._counters[name] += n
+
+    def _lookup(self, key):
+        """(size, payload) for a live entry, dropping it if expired"""
+        db = self._db()
+        row = db.execute("SELECT expires_at FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count('misses')
+            return False
+        if row[0] < time.time():
+            self._remove([key])
+            self._count('expired')
+            self._count('misses')
+            return False
+        db.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        return True
+
+    def contains(self, key):
+        row = self._db().execute("SELECT expires_at FROM results WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] >= time.time()
+
+    def _record(self, key, size, ttl, payload=None):
+        now = time.time()
+        self._db().execute(
+            "INSERT OR REPLACE INTO results (key, size, expires_at, last_access, payload) VALUES (?, ?, ?, ?, ?)",
+            (key, size, now + ttl, now, payload),
+        )
+        self._count('writes')
+        self._evict()
+
+    def _evict(self):
+        """Drop expired results, then least recently used ones until under max_bytes"""
+        db = self._db()
+        expired = [k for (k,) in db.execute("SELECT key FROM results WHERE expires_at < ?", (time.time(),))]
+        self._remove(expired)
+        self._count('expired', len(expired))
+
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM results ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            victims.append(key)
+            total -= size
+        self._remove(victims)
+        self._count('evictions', len(victims))
+
+    def _remove(self, keys):
+        if keys:
+            self._db().executemany("DELETE FROM results WHERE key = ?", [(k,) for k in keys])
+
+    def clear(self):
+        keys = [k for (k,) in self._db().execute("SELECT key FROM results")]
+        self._remove(keys)
+
+    def stats(self):
+        entries, size = self._db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        with self._counters_lock:
+            snapshot = dict(self._counters)
+        snapshot.update({'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes})
+        return snapshot
+
+
+class ArrowFileResultStore(_SQLiteIndexedStore):
+    """Arrow IPC files on local disk, memory-mapped on read instead of copied"""
+
+    def __init__(self, directory, max_bytes=512 * 1024 ** 2):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        super().__init__(os.path.join(directory, 'index.sqlite'), max_bytes)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.arrow")
+
+    def get(self, key):
+        if not self._lookup(key):
+            return None
+        try:
+            table = pa.ipc.open_file(pa.memory_map(self._path(key), 'r')).read_all()
+        except (OSError, pa.ArrowInvalid):
+            self._remove([key])
+            self._count('misses')
+            return None
+        self._count('hits')
+        return _to_pandas(table)
+
+    def put(self, key, df, ttl):
+        table = _to_arrow(df)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            size = os.path.getsize(tmp_path)
+            # Readers in other processes either see the old file or the complete new one
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._record(key, size, ttl)
+
+    def _remove(self, keys):
+        super()._remove(keys)
+        for key in keys:
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+
+
+class SQLiteResultStore(_SQLiteIndexedStore):
+    """Arrow IPC blobs stored inside one SQLite file"""
+
+    def __init__(self, path, max_bytes=512 * 1024 ** 2):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        super().__init__(path, max_bytes)
+
+    def get(self, key):
+        if not self._lookup(key):
+            return None
+        row = self._db().execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        # py_buffer wraps the blob without copying it again
+        return _to_pandas(pa.ipc.open_stream(pa.py_buffer(row[0])).read_all())
+
+    def put(self, key, df, ttl):
+        table = _to_arrow(df)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        payload = sink.getvalue().to_pybytes()
+        # INSERT OR REPLACE runs in one implicit transaction, so the write is atomic
+        self._record(key, len(payload), ttl, payload)
+
+
+def create_result_store(backend, path=None, max_bytes=512 * 1024 ** 2):
+    """Build the configured backend ('arrow', 'sqlite'), or None when disabled"""
+    if not backend or backend == 'none':
+        return None
+    path = path or os.path.join(tempfile.gettempdir(), 'aura_result_store')
+    if backend == 'arrow':
+        return ArrowFileResultStore(path, max_bytes)
+    if backend == 'sqlite':
+        return SQLiteResultStore(os.path.join(path, 'results.sqlite'), max_bytes)
+    raise ValueError(f"Unknown result store backend: {backend}")
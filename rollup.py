@@ -0,0 +1,220 @@
+"""Managed hourly rollup of apps.supply_aura_rtm, with a create/refresh/status CLI
+
+The rollup holds the fact table pre-aggregated to source × brand × feature × hour, with the
+same column names as the fact table. Every dashboard query sums those columns grouped by
+(a subset of) the same keys, so it gives the same results on either table. With
+AURA_USE_ROLLUP on, dashboard loads read the rollup whenever it covers their window (see
+`covers`); raw extracts always read the fact table.
+
+A one-row `<table>_state` table records the first hour the rollup holds (covered_from) and
+when its last refresh read the fact table (refreshed_at). A refresh re-aggregates every
+hour from `lookback_hours` before the previous refresh onward, replacing those hours in
+one transaction, so rows that arrive late for recent hours are picked up too.
+
+    python rollup.py create --days 8     # build the rollup for the last 8 days
+    python rollup.py refresh             # incremental: re-aggregate the recent hours
+    python rollup.py status
+
+Run `refresh` from cron every few minutes (at least as often as AURA_ROLLUP_MAX_LAG_MINUTES).
+The CLI connects like the dashboard does (Redshift, or AURA_DB_BACKEND=duckdb with
+AURA_LOCAL_DB_PATH set so that the dashboard sees the same database file).
+"""
+import argparse
+import sys
+import warnings
+from datetime import datetime, timedelta
+
+FACT_TABLE = 'apps.supply_aura_rtm'
+DEFAULT_TABLE = 'apps.supply_aura_rtm_hourly'
+
+METRIC_COLUMNS = ['revenue', 'notification_shown', 'experience_shown', 'install_success', 'new_devices']
+
+
+def _timestamp(value):
+    return f"CAST('{value:%Y-%m-%d %H:%M:%S}' AS TIMESTAMP)"
+
+
+def _split_name(table):
+    schema, _, name = table.rpartition('.')
+    return schema or 'public', name
+
+
+def aggregate_query(since, fact_table=FACT_TABLE):
+    """Fact rows from `since` onward summed to source × brand × feature × hour"""
+    # SUM(BIGINT) is BIGINT on Redshift but 128-bit on DuckDB; keep the fact table's types
+    sums = ',\n    '.join(
+        f"COALESCE(SUM({column}), 0) AS {column}" if column == 'revenue'
+        else f"CAST(COALESCE(SUM({column}), 0) AS BIGINT) AS {column}"
+        for column in METRIC_COLUMNS
+    )
+    return f"""
+SELECT
+    DATE_TRUNC('hour', date_hour) AS date_hour,
+    source,
+    brand,
+    feature,
+    {sums}
+FROM {fact_table}
+WHERE date_hour >= {_timestamp(since)}
+GROUP BY 1, 2, 3, 4
+"""
+
+
+def table_exists(conn, table):
+    schema, name = _split_name(table)
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = '{schema}' AND table_name = '{name}'"
+        )
+        return cur.fetchone()[0] > 0
+
+
+def read_state(conn, table=DEFAULT_TABLE):
+    """{'covered_from', 'refreshed_at'} of the rollup, or None if it has not been created"""
+    if not table_exists(conn, f"{table}_state"):
+        return None
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT covered_from, refreshed_at FROM {table}_state")
+        row = cur.fetchone()
+    if row is None:
+        return None
+    return {'covered_from': row[0], 'refreshed_at': row[1]}
+
+
+def covers(state, start, end=None, now=None, max_lag=timedelta(minutes=15)):
+    """Whether a rollup in `state` answers queries over [start, end] (UTC; end defaults to now)
+
+    It must hold hours from `start` on, and its last refresh may be at most `max_lag`
+    older than the end of the window (or than now, for a window reaching the present).
+    """
+    if state is None:
+        return False
+    now = now or datetime.utcnow()
+    end = min(end or now, now)
+    return state['covered_from'] <= start and end - state['refreshed_at'] <= max_lag
+
+
+def _write_state(cur, table, covered_from, refreshed_at):
+    cur.execute(f"DELETE FROM {table}_state")
+    cur.execute(f"INSERT INTO {table}_state (covered_from, refreshed_at) VALUES ({_timestamp(covered_from)}, {_timestamp(refreshed_at)})")
+
+
+def _in_transaction(conn, statements):
+    """Run statements(cursor) in one transaction (readers see the old or the new rollup)"""
+    autocommit = conn.autocommit
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            statements(cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = autocommit
+
+
+def create(conn, table=DEFAULT_TABLE, days=8, replace=False, redshift=True, now=None):
+    """Build the rollup from midnight `days - 1` days ago (UTC) through now; returns its state"""
+    if table_exists(conn, table) and not replace:
+        raise RuntimeError(f"{table} already exists (refresh it, or create it with --replace)")
+    now = now or datetime.utcnow()
+    covered_from = datetime.combine(now.date() - timedelta(days=days - 1), datetime.min.time())
+    sort_key = " SORTKEY (date_hour)" if redshift else ""
+
+    def statements(cur):
+        cur.execute(f"DROP TABLE IF EXISTS {table}")
+        cur.execute(f"DROP TABLE IF EXISTS {table}_state")
+        cur.execute(f"CREATE TABLE {table}{sort_key} AS {aggregate_query(covered_from)}")
+        cur.execute(f"CREATE TABLE {table}_state (covered_from TIMESTAMP, refreshed_at TIMESTAMP)")
+        _write_state(cur, table, covered_from, now)
+
+    _in_transaction(conn, statements)
+    return {'covered_from': covered_from, 'refreshed_at': now}
+
+
+def refresh(conn, table=DEFAULT_TABLE, lookback_hours=3, retain_days=None, now=None):
+    """Re-aggregate the hours from `lookback_hours` before the last refresh; returns the new state
+
+    With `retain_days`, hours before midnight `retain_days - 1` days ago are dropped.
+    """
+    state = read_state(conn, table)
+    if state is None:
+        raise RuntimeError(f"{table} does not exist yet (run: python rollup.py create)")
+    now = now or datetime.utcnow()
+    since = (state['refreshed_at'] - timedelta(hours=lookback_hours)).replace(minute=0, second=0, microsecond=0)
+    covered_from = state['covered_from']
+    if retain_days:
+        covered_from = max(covered_from, datetime.combine(now.date() - timedelta(days=retain_days - 1), datetime.min.time()))
+    columns = ', '.join(['date_hour', 'source', 'brand', 'feature'] + METRIC_COLUMNS)
+
+    def statements(cur):
+        cur.execute(f"DELETE FROM {table} WHERE date_hour >= {_timestamp(since)} OR date_hour < {_timestamp(covered_from)}")
+        cur.execute(f"INSERT INTO {table} ({columns}) {aggregate_query(since)}")
+        _write_state(cur, table, covered_from, now)
+
+    _in_transaction(conn, statements)
+    return {'covered_from': covered_from, 'refreshed_at': now, 'since': since}
+
+
+def status(conn, table=DEFAULT_TABLE):
+    """State plus the rollup's row count and hour range, or None if it has not been created"""
+    state = read_state(conn, table)
+    if state is None:
+        return None
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*), MIN(date_hour), MAX(date_hour) FROM {table}")
+        rows, first_hour, last_hour = cur.fetchone()
+    return {**state, 'rows': rows, 'first_hour': first_hour, 'last_hour': last_hour}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', choices=['create', 'refresh', 'status'])
+    parser.add_argument('--table', default=None, help=f"rollup table (default: AURA_ROLLUP_TABLE or {DEFAULT_TABLE})")
+    parser.add_argument('--days', type=int, default=8, help="create: days of history to aggregate, through today")
+    parser.add_argument('--replace', action='store_true', help="create: drop and rebuild an existing rollup")
+    parser.add_argument('--lookback-hours', type=int, default=3, help="refresh: hours before the last refresh to re-aggregate")
+    parser.add_argument('--retain-days', type=int, default=None, help="refresh: drop hours older than this many days")
+    args = parser.parse_args()
+
+    with warnings.catch_warnings():
+        # Streamlit warns about the missing script run context outside `streamlit run`
+        warnings.simplefilter('ignore')
+        from aura_dashboard import DB_BACKEND, ROLLUP_MAX_LAG_MINUTES, ROLLUP_TABLE, create_connection
+    table = args.table or ROLLUP_TABLE
+    conn = create_connection()
+    if conn is None:
+        print("✗ Could not connect to the database; check the REDSHIFT_* settings")
+        sys.exit(1)
+
+    try:
+        if args.command == 'create':
+            state = create(conn, table, days=args.days, replace=args.replace, redshift=DB_BACKEND != 'duckdb')
+            print(f"✓ Created {table} from {state['covered_from']:%Y-%m-%d %H:%M} (UTC)")
+        elif args.command == 'refresh':
+            state = refresh(conn, table, lookback_hours=args.lookback_hours, retain_days=args.retain_days)
+            print(f"✓ Refreshed {table}: hours from {state['since']:%Y-%m-%d %H:%M} re-aggregated")
+
+        info = status(conn, table)
+        if info is None:
+            print(f"✗ {table} does not exist yet (run: python rollup.py create)")
+            sys.exit(1)
+        now = datetime.utcnow()
+        lag = now - info['refreshed_at']
+        window_start = datetime.combine(now.date() - timedelta(days=7), datetime.min.time())
+        covered = covers(info, window_start, now=now, max_lag=timedelta(minutes=ROLLUP_MAX_LAG_MINUTES))
+        print(f"Table:        {table} ({info['rows']:,} rows)")
+        print(f"Hours:        {info['first_hour']} → {info['last_hour']}")
+        print(f"Covers from:  {info['covered_from']}")
+        print(f"Refreshed at: {info['refreshed_at']} ({lag.total_seconds() / 60:,.0f} min ago)")
+        print(f"Dashboard window covered: {'yes' if covered else 'no'} (max lag {ROLLUP_MAX_LAG_MINUTES} min)")
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
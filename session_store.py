@@ -0,0 +1,80 @@
+"""Per-session store of loaded dashboard data with an LRU memory budget
+
+Every browser session keeps the data it loaded in st.session_state so reruns do not query
+again. A session can hold several loads (e.g. after switching between selections); once
+their combined size exceeds the budget, the least recently used loads are dropped. The
+most recently used load is always kept, even if it alone is over budget.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def value_nbytes(value):
+    """Approximate memory held by a DataFrame, cube, array or container of them"""
+    if value is None:
+        return 0
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(value_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(value_nbytes(v) for v in value)
+    return 0
+
+
+class SessionFrameStore:
+    """LRU map of selection key -> loaded data ({name: frame/cube}) bounded by `budget_bytes`"""
+
+    def __init__(self, budget_bytes, on_evict=None):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # key -> (data, nbytes), least recently used first
+        self.evictions = 0
+        self.on_evict = on_evict  # called once per evicted load
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size in self._entries.values())
+
+    def get(self, key):
+        """Data stored under `key` (marking it most recently used), or None"""
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def find(self, predicate):
+        """Most recently used data for which predicate(data) is true, or None"""
+        for key in reversed(self._entries):
+            data = self._entries[key][0]
+            if predicate(data):
+                self._entries.move_to_end(key)
+                return data
+        return None
+
+    def put(self, key, data):
+        """Store `data` as the most recently used entry and evict down to the budget"""
+        self._entries[key] = (data, value_nbytes(data))
+        self._entries.move_to_end(key)
+        while len(self._entries) > 1 and self.nbytes > self.budget_bytes:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict()
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,58 @@
+"""Request coalescing: concurrent identical calls share one in-flight execution"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs `fn` once per key at a time; callers arriving meanwhile wait and share its outcome
+
+    Unlike a result cache nothing is kept after the call finishes, so this only removes
+    duplicate work that overlaps in time (e.g. a dozen sessions opening the dashboard with
+    the same filters at once). Exceptions are shared with every waiter as well.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'executions': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['coalesced'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        """Number of distinct keys currently executing"""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,155 @@
+"""Seeded, vectorized synthetic Aura data at any scale
+
+Two layouts are generated, both from NumPy arrays in a single pass (no Python loops over
+rows), so millions of rows take about a second:
+
+- synthetic_facts: hour-level rows in the apps.supply_aura_rtm layout over any number of days
+- synthetic_scan: single-scan rows (source × brand × feature × hour × period), the
+  result shape of build_single_scan_query
+
+synthetic_dashboard_frames derives the summary, hourly and new_devices frames from a
+synthetic scan with dashboard_frames, exactly as live data is derived, so sample mode,
+load tests and benchmarks all see the same columns and arithmetic as Redshift results.
+The same arguments and seed always give the same data.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from dashboard_frames import PERIODS, derive_dashboard_frames
+from frame_schema import compact_frame
+
+DEFAULT_SOURCES = ('pre-install', 'FOTA')
+
+# Raw metric columns of apps.supply_aura_rtm -> single-scan column names
+FACT_METRICS = {
+    'revenue': 'revenue',
+    'notification_shown': 'notif',
+    'experience_shown': 'exp',
+    'install_success': 'install',
+    'new_devices': 'new_devices',
+}
+
+
+def _names(values, prefix):
+    """A list of names as given, or `values` generated names when an int is passed"""
+    if isinstance(values, int):
+        return [f"{prefix}_{i:04d}" for i in range(values)]
+    return list(values)
+
+
+def _hour_profile():
+    """Relative traffic per hour of day: quiet at night, peaking mid-afternoon"""
+    hours = np.arange(24)
+    profile = 0.55 - 0.45 * np.cos((hours - 3) / 24 * 2 * np.pi)
+    return profile / profile.sum()
+
+
+def _categorical(codes, categories):
+    """Categorical column straight from codes, with the compact schema's sorted categories"""
+    order = np.argsort(categories)
+    remap = np.empty(len(categories), dtype='int32')
+    remap[order] = np.arange(len(categories), dtype='int32')
+    return pd.Categorical.from_codes(remap[codes], categories=sorted(categories))
+
+
+class _Population:
+    """Per source × brand × feature traffic levels and conversion rates"""
+
+    def __init__(self, rng, n_sources, n_brands, n_features, daily_notifications):
+        shape = (n_sources, n_brands, n_features)
+        self.daily = rng.lognormal(np.log(daily_notifications), 1.0, shape)
+        self.exp_rate = rng.uniform(0.3, 0.8, (1, 1, n_features)) * np.ones(shape)
+        self.install_rate = rng.uniform(0.02, 0.15, shape)
+        self.new_device_rate = rng.uniform(0.05, 0.2, shape)
+        self.ecpi = rng.gamma(4.0, 0.1, (1, n_brands, 1)) * np.ones(shape)
+
+    def draw(self, rng, combo, hour, scale):
+        """Metric arrays for rows at flat combo index `combo`, hour of day and volume scale"""
+        expected = self.daily.ravel()[combo] * _hour_profile()[hour] * scale
+        notif = rng.poisson(expected)
+        exp = rng.binomial(notif, self.exp_rate.ravel()[combo])
+        install = rng.binomial(exp, self.install_rate.ravel()[combo])
+        revenue = np.round(install * self.ecpi.ravel()[combo] * rng.lognormal(0.0, 0.1, len(combo)), 4)
+        new_devices = rng.poisson(notif * self.new_device_rate.ravel()[combo])
+        return {'revenue': revenue, 'notif': notif, 'exp': exp, 'install': install, 'new_devices': new_devices}
+
+
+def synthetic_scan(brands, features, sources=DEFAULT_SOURCES, through_hour=23, seed=0,
+                   daily_notifications=2000, growth=0.15):
+    """Single-scan rows for today and last week, hours 0..through_hour of both days
+
+    brands/features/sources are lists of names or a count of generated names. Today's
+    volume differs from last week's by a per-combination factor of about ±`growth`.
+    """
+    rng = np.random.default_rng(seed)
+    sources, brands, features = _names(sources, 'source'), _names(brands, 'brand'), _names(features, 'feature')
+    population = _Population(rng, len(sources), len(brands), len(features), daily_notifications)
+    hours = through_hour + 1
+    n_combos = len(sources) * len(brands) * len(features)
+
+    # Row order: combination × hour × period
+    combo = np.repeat(np.arange(n_combos), hours * len(PERIODS))
+    hour = np.tile(np.repeat(np.arange(hours), len(PERIODS)), n_combos)
+    period = np.tile(np.arange(len(PERIODS)), n_combos * hours)
+
+    change = rng.lognormal(0.0, growth, n_combos)
+    scale = np.where(period == PERIODS.index('today'), change[combo], 1.0)
+    metrics = population.draw(rng, combo, hour, scale)
+
+    source_code, brand_code, feature_code = np.unravel_index(combo, (len(sources), len(brands), len(features)))
+    scan = pd.DataFrame({
+        'source': _categorical(source_code, sources),
+        'brand': _categorical(brand_code, brands),
+        'feature': _categorical(feature_code, features),
+        'hour_of_day': hour.astype('int8'),
+        'period': _categorical(period, PERIODS),
+        **metrics,
+    })
+    return compact_frame(scan)
+
+
+def synthetic_facts(brands, features, sources=DEFAULT_SOURCES, days=8, end=None, seed=0,
+                    daily_notifications=2000, rows_per_hour=1):
+    """Hour-level rows in the apps.supply_aura_rtm layout for `days` days up to `end`
+
+    `end` (a datetime, default now in UTC) is the last hour included; rows start at
+    midnight `days - 1` days before it. Each day's volume varies by a few percent.
+    rows_per_hour > 1 splits every source × brand × feature × hour into that many rows
+    (like per-app rows in the real table) to scale the row count at the same totals.
+    """
+    rng = np.random.default_rng(seed)
+    sources, brands, features = _names(sources, 'source'), _names(brands, 'brand'), _names(features, 'feature')
+    population = _Population(rng, len(sources), len(brands), len(features), daily_notifications)
+    end = (end or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+    start = datetime.combine(end.date() - timedelta(days=days - 1), datetime.min.time())
+    n_hours = int((end - start) / timedelta(hours=1)) + 1
+    n_combos = len(sources) * len(brands) * len(features)
+
+    # Row order: combination × hour × split
+    combo = np.repeat(np.arange(n_combos), n_hours * rows_per_hour)
+    offset = np.tile(np.repeat(np.arange(n_hours), rows_per_hour), n_combos)
+    daily_change = rng.lognormal(0.0, 0.05, (n_combos, days))
+    metrics = population.draw(rng, combo, offset % 24, daily_change[combo, offset // 24] / rows_per_hour)
+
+    source_code, brand_code, feature_code = np.unravel_index(combo, (len(sources), len(brands), len(features)))
+    facts = pd.DataFrame({
+        'date_hour': np.datetime64(start, 'h') + offset.astype('timedelta64[h]'),
+        'source': _categorical(source_code, sources),
+        'brand': _categorical(brand_code, brands),
+        'feature': _categorical(feature_code, features),
+    })
+    for column, metric in FACT_METRICS.items():
+        facts[column] = metrics[metric]
+    return facts
+
+
+def synthetic_dashboard_frames(brands, features, sources=DEFAULT_SOURCES, through_hour=23, seed=0, **kwargs):
+    """(summary_df, hourly_df, (new_devices_today, new_devices_last_week), new_devices_hourly)
+
+    The same frames get_data builds from a live single scan, derived from synthetic_scan.
+    """
+    scan = synthetic_scan(brands, features, sources, through_hour=through_hour, seed=seed, **kwargs)
+    summary, hourly, new_devices_totals, new_devices_hourly = derive_dashboard_frames(scan)
+    return compact_frame(summary), compact_frame(hourly), new_devices_totals, compact_frame(new_devices_hourly)
@@ -0,0 +1,119 @@
+import sqlite3
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+from connection_pool import ConnectionPool
+from metrics import DashboardMetrics
+from query_telemetry import MISS, RESULT_STORE, QueryTelemetry, query_label
+from session_store import SessionFrameStore
+
+
+def scrape(url):
+    """Fetch a metrics endpoint and parse its samples into {'name{labels}': value}"""
+    with urllib.request.urlopen(url, timeout=5) as response:
+        assert response.status == 200
+        assert response.headers['Content-Type'].startswith('text/plain')
+        body = response.read().decode('utf-8')
+    samples = {}
+    for line in body.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return body, samples
+
+
+def test_metrics():
+    """Serve the dashboard metrics on a free local port and scrape them"""
+    metrics = DashboardMetrics()
+    server = metrics.serve(0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    print(f"Metrics endpoint: {url}")
+
+    try:
+        # Queries recorded by the telemetry feed the latency histogram
+        telemetry = QueryTelemetry(on_record=metrics.observe_query)
+        label = query_label('build_single_scan_query', 'pre-install', ['samsung'], ['oobe'])
+        telemetry.record(label, MISS, {'execute': 0.3, 'fetch': 0.1}, 0.42, pd.DataFrame({'x': [1, 2]}))
+        telemetry.record(label, RESULT_STORE, {}, 0.003, pd.DataFrame({'x': [1, 2]}))
+        telemetry.record(label, MISS, {}, 1.5, error=TimeoutError("statement timeout"))
+
+        # get_data cache outcomes and sample-data fallbacks
+        with metrics.cached_call('get_data'):
+            metrics.computed()
+        with metrics.cached_call('get_data'):
+            pass
+        metrics.sample_fallback('query_error')
+
+        # Two sessions, one of which evicts a load to stay under its budget
+        frame = pd.DataFrame({'x': range(1000)})
+        sessions = [SessionFrameStore(10 * 1024 ** 2, on_evict=metrics.session_evicted), SessionFrameStore(1, on_evict=metrics.session_evicted)]
+        for store in sessions:
+            metrics.track_session(store)
+            store.put('a', {'df': frame})
+            store.put('b', {'df': frame})
+
+        # A scan cache's stats and a pool with one connection checked out
+        metrics.watch_cache('scan_today', {'full_hits': 3, 'partial_hits': 1, 'misses': 2, 'evictions': 0},
+                            hits=('full_hits', 'partial_hits'))
+        pool = ConnectionPool(lambda: sqlite3.connect(':memory:', check_same_thread=False), minconn=0, maxconn=4)
+        metrics.watch_pool(pool)
+        conn = pool.getconn()
+
+        started = time.perf_counter()
+        body, samples = scrape(url)
+        print(f"✓ Scraped {len(samples)} samples in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        labels = 'builder="build_single_scan_query",cache="miss"'
+        assert samples[f'aura_query_duration_seconds_count{{{labels}}}'] == 1
+        assert samples[f'aura_query_duration_seconds_bucket{{{labels},le="0.5"}}'] == 1
+        assert samples[f'aura_query_duration_seconds_bucket{{{labels},le="0.25"}}'] == 0
+        assert samples[f'aura_query_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 1
+        assert abs(samples[f'aura_query_duration_seconds_sum{{{labels}}}'] - 0.42) < 1e-6
+        assert samples['aura_query_duration_seconds_count{builder="build_single_scan_query",cache="result_store"}'] == 1
+        assert samples['aura_query_errors_total{builder="build_single_scan_query"}'] == 1
+        print("✓ Query latency histogram and errors")
+
+        assert samples['aura_cache_misses_total{cache="get_data"}'] == 1
+        assert samples['aura_cache_hits_total{cache="get_data"}'] == 1
+        assert samples['aura_cache_hits_total{cache="scan_today"}'] == 4
+        assert samples['aura_cache_misses_total{cache="scan_today"}'] == 2
+        assert samples['aura_cache_evictions_total{cache="session"}'] == 1
+        assert samples['aura_sample_data_fallbacks_total{reason="query_error"}'] == 1
+        print("✓ Cache hits/misses/evictions and sample-data fallbacks")
+
+        assert samples['aura_active_sessions'] == 2
+        assert samples['aura_session_state_bytes'] == sum(store.nbytes for store in sessions) > 0
+        del sessions, store
+        _, samples = scrape(url)
+        assert samples['aura_active_sessions'] == 0
+        print("✓ Active sessions and session-state bytes")
+
+        assert samples['aura_pool_connections{state="in_use"}'] == 1
+        assert samples['aura_pool_max_connections'] == 4
+        assert samples['aura_pool_utilization'] == 0.25
+        assert samples['aura_pool_checkouts_total'] == 1
+        pool.putconn(conn)
+        _, samples = scrape(url)
+        assert samples['aura_pool_utilization'] == 0
+        pool.closeall()
+        print("✓ Connection pool utilization")
+
+        assert '# TYPE aura_query_duration_seconds histogram' in body
+        assert '# TYPE aura_cache_hits_total counter' in body
+        assert body.count('# TYPE aura_cache_hits_total') == 1
+        try:
+            urllib.request.urlopen(url.replace('/metrics', '/other'), timeout=5)
+            raise AssertionError("expected a 404 outside /metrics")
+        except urllib.error.HTTPError as e:
+            assert e.code == 404
+        print("✓ Exposition format")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_metrics()
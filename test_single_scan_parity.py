@@ -0,0 +1,55 @@
+import pandas as pd
+
+import aura_dashboard as dashboard
+import dashboard_frames
+from local_backend import local_database
+
+BRANDS = ['samsung', 'motorola', 'tmobile']
+FEATURES = ['oobe', 'silent', 'reef']
+SOURCE = 'pre-install'
+
+
+def assert_same_frame(name, multi, single, keys):
+    """Same columns, rows and values; dtypes may differ (driver sums vs local sums)
+
+    Rows are compared in `keys` order: the hourly queries only ORDER BY hour_of_day, so
+    the order of brand/feature rows within an hour is up to the database.
+    """
+    multi = multi.sort_values(keys, kind='stable', ignore_index=True)
+    single = single.sort_values(keys, kind='stable', ignore_index=True)
+    pd.testing.assert_frame_equal(
+        multi, single,
+        check_dtype=False, check_exact=False, rtol=1e-9,
+    )
+    print(f"✓ {name}: {len(single)} rows match")
+
+
+def test_single_scan_parity():
+    """The per-view queries and one scan + dashboard_frames give the same frames on the DuckDB shim"""
+    database = local_database(BRANDS, FEATURES, days=8, rows_per_hour=2, seed=7)
+    print(f"Synthetic table: {database.rows:,} rows")
+    conn = database.connect()
+
+    try:
+        for source in (SOURCE, None):
+            print(f"Source: {source or 'all'}")
+            queries, _ = dashboard.load_queries(source, BRANDS, FEATURES)
+            multi = {name: dashboard.run_query(sql, conn) for name, sql in queries.items()}
+            raw = dashboard.run_query(dashboard.build_single_scan_query(source, BRANDS, FEATURES), conn)
+            summary, hourly, (new_today, new_last_week), new_devices_hourly = dashboard_frames.derive_dashboard_frames(raw)
+
+            assert not multi['summary'].empty, "synthetic data should fill the summary"
+            assert_same_frame('summary', multi['summary'], summary, ['brand', 'feature'])
+            assert_same_frame('hourly', multi['hourly'], hourly, ['hour_of_day', 'brand', 'feature'])
+            assert_same_frame('new_devices_hourly', multi['new_devices_hourly'], new_devices_hourly, ['hour_of_day'])
+
+            totals = multi['new_devices'].iloc[0]
+            assert (totals['new_devices_today'], totals['new_devices_last_week']) == (new_today, new_last_week), \
+                f"new_devices totals differ: {tuple(totals)} vs {(new_today, new_last_week)}"
+            print(f"✓ new_devices totals match: {new_today:,} today, {new_last_week:,} last week")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_single_scan_parity()